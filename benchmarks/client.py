@@ -0,0 +1,100 @@
+"""
+Minimal in-process Socket.IO client talking to the `socketio.ASGIApp`
+of a `FastAPISIO` instance directly through ASGI calls, using the
+long-polling transport. Needs no network, so benchmarks run offline.
+"""
+
+import asyncio
+import json
+from typing import Any, List
+
+from fastapi_sio import FastAPISIO
+
+RECORD_SEPARATOR = "\x1e"
+
+
+class InProcessClient:
+    def __init__(self, sio_app: FastAPISIO):
+        self._asgiapp = sio_app._asgiapp
+        self._path = sio_app._asgiapp.engineio_path
+        self._ack_id = 0
+        self.eio_sid: str | None = None
+        self.sid: str | None = None
+
+    async def request(self, method: str, body: str = "") -> str:
+        query = "EIO=4&transport=polling"
+        if self.eio_sid is not None:
+            query += f"&sid={self.eio_sid}"
+
+        encoded_body = body.encode()
+        headers = [(b"host", b"localhost")]
+        if encoded_body:
+            headers += [
+                (b"content-type", b"text/plain;charset=UTF-8"),
+                (b"content-length", str(len(encoded_body)).encode()),
+            ]
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": self._path,
+            "raw_path": self._path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        request_sent = False
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": encoded_body}
+            await asyncio.Future()
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self._asgiapp(scope, receive, send)
+        return b"".join(chunks).decode()
+
+    async def receive(self) -> List[str]:
+        """
+        Long-polls for Socket.IO packets waiting for this client.
+        """
+        payload = await self.request("GET")
+        return [
+            packet[1:]
+            for packet in payload.split(RECORD_SEPARATOR)
+            if packet.startswith("4")
+        ]
+
+    async def connect(self):
+        handshake = await self.request("GET")
+        self.eio_sid = json.loads(handshake[1:])["sid"]
+        await self.request("POST", "40")
+        for packet in await self.receive():
+            if packet.startswith("0"):
+                self.sid = json.loads(packet[1:])["sid"]
+
+    async def emit(self, event: str, data: Any = None) -> None:
+        await self.request("POST", "42" + json.dumps([event, data]))
+
+    async def call(self, event: str, data: Any = None) -> Any:
+        """
+        Emits the event and waits for the acknowledgement.
+        """
+        self._ack_id += 1
+        ack = f"3{self._ack_id}"
+        await self.request("POST", f"42{self._ack_id}" + json.dumps([event, data]))
+        while True:
+            for packet in await self.receive():
+                if packet.startswith(ack):
+                    return json.loads(packet[len(ack) :])
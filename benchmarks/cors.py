@@ -0,0 +1,51 @@
+"""
+Microbenchmark of the CORS origin check done by Engine.IO for every
+handshake, comparing the plain regex callable with the compiled
+`OriginMatcher`, for exact and regex matched origins.
+
+    python -m benchmarks.cors --checks 100000
+"""
+
+import argparse
+import json
+from timeit import timeit
+from typing import Any, Dict
+
+import engineio
+
+from fastapi_sio.utils import OriginMatcher, match_origin
+
+ORIGINS = [f"https://app-{index}.example.com" for index in range(20)]
+ORIGIN_REGEX = r"https://[a-z0-9-]+\.drones\.example\.com"
+REQUESTS = {
+    "exact": "https://app-19.example.com",
+    "regex": "https://fleet-7.drones.example.com",
+    "rejected": "https://evil.example.org",
+}
+
+
+def bench_cors(checks: int) -> Dict[str, Any]:
+    configurations = {
+        "list": ORIGINS,
+        "regex_callable": lambda origin: match_origin(origin, ORIGIN_REGEX),
+        "matcher": OriginMatcher(ORIGINS, ORIGIN_REGEX),
+    }
+
+    results: Dict[str, Any] = {}
+    for name, cors_allowed_origins in configurations.items():
+        server = engineio.AsyncServer(cors_allowed_origins=cors_allowed_origins)
+        for request, origin in REQUESTS.items():
+            environ = {"HTTP_ORIGIN": origin}
+            seconds = timeit(
+                lambda: server._cors_allowed_origins(environ), number=checks
+            )
+            results[f"{name}/{request}"] = {"checks_per_second": checks / seconds}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(json.dumps(bench_cors(args.checks), indent=2))
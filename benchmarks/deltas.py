@@ -0,0 +1,93 @@
+"""
+Size and encode time of a large, slowly-changing fleet state sent as
+a full snapshot versus a merge patch or a JSON patch of the previous one,
+as done by emitters with `DeltaPolicy`.
+
+    python -m benchmarks.deltas --drones 1000 --changed 10
+"""
+
+import argparse
+import json
+from timeit import timeit
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from fastapi_sio.deltas import json_patch, merge_patch
+
+
+class DronePosition(BaseModel):
+    latitude: float
+    longitude: float
+    altitude: float
+
+
+class DroneState(BaseModel):
+    drone_id: int
+    name: str
+    battery: float
+    position: DronePosition
+    waypoints: List[DronePosition]
+
+
+class FleetState(BaseModel):
+    mission: str
+    drones: Dict[str, DroneState]
+
+
+def make_fleet(drones: int, changed: int, step: int) -> FleetState:
+    return FleetState(
+        mission="survey",
+        drones={
+            str(index): DroneState(
+                drone_id=index,
+                name=f"drone-{index}",
+                battery=100 - (step if index < changed else 0),
+                position=DronePosition(
+                    latitude=50 + (step if index < changed else 0) / 1000,
+                    longitude=14,
+                    altitude=120,
+                ),
+                waypoints=[
+                    DronePosition(latitude=50, longitude=14 + i / 100, altitude=120)
+                    for i in range(5)
+                ],
+            )
+            for index in range(drones)
+        },
+    )
+
+
+def bench_deltas(drones: int, changed: int, number: int) -> Dict[str, Any]:
+    old = make_fleet(drones, changed, 0)
+    new = make_fleet(drones, changed, 1)
+    old_data = old.model_dump(mode="json")
+
+    def snapshot():
+        return json.dumps(new.model_dump(mode="json"))
+
+    def patch(diff):
+        return lambda: json.dumps(diff(old_data, new.model_dump(mode="json")))
+
+    results: Dict[str, Any] = {}
+    for name, encode in {
+        "snapshot": snapshot,
+        "merge-patch": patch(merge_patch),
+        "json-patch": patch(json_patch),
+    }.items():
+        seconds = timeit(encode, number=number)
+        results[name] = {
+            "bytes": len(encode()),
+            "encodes_per_second": number / seconds,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drones", type=int, default=1000)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    print(json.dumps(bench_deltas(args.drones, args.changed, args.number), indent=2))
@@ -0,0 +1,74 @@
+"""
+Compares the default `SIOJsonEmitter` encoding path (`jsonable_encoder`
+followed by the packet JSON dump) with the `pre_encode=True` path
+(single `model_dump_json` spliced into the packet).
+
+    python -m benchmarks.emit_encoding
+"""
+
+from datetime import datetime
+from timeit import timeit
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+from socketio import packet
+
+from fastapi_sio import FastAPISIO
+
+
+class Position(BaseModel):
+    lat: float
+    lon: float
+    alt: float
+    timestamp: datetime
+
+
+class Telemetry(BaseModel):
+    drone_id: str
+    position: Position
+    battery: float
+    tags: list[str]
+    history: list[Position]
+
+
+def make_payload() -> Telemetry:
+    position = Position(lat=50.08, lon=14.42, alt=320.5, timestamp=datetime.now())
+    return Telemetry(
+        drone_id="dt-0001",
+        position=position,
+        battery=0.87,
+        tags=["survey", "night", "rtk"],
+        history=[position] * 20,
+    )
+
+
+def run(number: int = 5_000) -> dict[str, float]:
+    sio_app = FastAPISIO(app=FastAPI(), asyncapi_url=None)
+    default = sio_app.create_emitter("default", model=Telemetry)
+    pre_encoded = sio_app.create_emitter(
+        "pre_encoded", model=Telemetry, pre_encode=True
+    )
+    packet_class = sio_app._sio.packet_class
+    payload = make_payload()
+
+    def encode(emitter):
+        def _encode():
+            packet_class(
+                packet.EVENT, data=[emitter.get_meta().event, emitter.encode(payload)]
+            ).encode()
+
+        return _encode
+
+    results = {
+        "default": timeit(encode(default), number=number) / number,
+        "pre_encode": timeit(encode(pre_encoded), number=number) / number,
+    }
+    results["speedup"] = results["default"] / results["pre_encode"]
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"default:    {results['default'] * 1e6:8.2f} us/emit")
+    print(f"pre_encode: {results['pre_encode'] * 1e6:8.2f} us/emit")
+    print(f"speedup:    {results['speedup']:8.2f}x")
@@ -0,0 +1,74 @@
+"""
+Import-time benchmark of `fastapi_sio`, run in a fresh interpreter with
+`python -X importtime`. Fails when the package modules take longer than
+the budget to import, or when modules needed only to serve the AsyncAPI
+spec get imported eagerly.
+
+    python -m benchmarks.import_time --budget-ms 50
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List
+
+# Modules loaded on the first spec request, never on import
+LAZY_MODULES = (
+    "fastapi_sio.asyncapi",
+    "fastapi_sio.schemas.asyncapi",
+    "rfc3986",
+    "packaging",
+)
+
+
+def measure(module: str) -> Dict[str, int]:
+    """
+    Returns self import time in microseconds for every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(self_us)
+    return timings
+
+
+def check(budget_ms: float, runs: int) -> List[str]:
+    errors = []
+    best: Dict[str, int] = {}
+    for _ in range(runs):
+        for name, self_us in measure("fastapi_sio").items():
+            best[name] = min(best.get(name, self_us), self_us)
+
+    for name in best:
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES):
+            errors.append(f"{name} is imported eagerly")
+
+    own = {name: us for name, us in best.items() if name.startswith("fastapi_sio")}
+    total_ms = sum(own.values()) / 1000
+    for name, us in sorted(own.items(), key=lambda item: -item[1]):
+        print(f"{us / 1000:8.2f} ms  {name}")
+    print(f"{total_ms:8.2f} ms  total (budget {budget_ms} ms)")
+
+    if total_ms > budget_ms:
+        errors.append(f"fastapi_sio imports in {total_ms:.2f} ms, over budget")
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    errors = check(args.budget_ms, args.runs)
+    for error in errors:
+        print(error, file=sys.stderr)
+    sys.exit(1 if errors else 0)
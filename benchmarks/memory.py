@@ -0,0 +1,87 @@
+"""
+Memory used by the server per connected client, measured with
+`tracemalloc` while in-process clients connect and join rooms,
+for the default `SIOAsyncManager` and python-socketio's `AsyncManager`.
+Also reports how long it takes all the clients to disconnect, which is
+quadratic with `AsyncManager`, so compare it on smaller client counts.
+
+    python -m benchmarks.memory --clients 10000 100000
+    python -m benchmarks.memory --clients 10000 --managers SIOAsyncManager AsyncManager
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import tracemalloc
+from time import perf_counter
+from typing import Any, Dict, List
+
+import socketio
+from fastapi import FastAPI
+
+from benchmarks.client import InProcessClient
+from fastapi_sio import FastAPISIO
+
+MANAGERS = {
+    "SIOAsyncManager": lambda: None,
+    "AsyncManager": socketio.AsyncManager,
+}
+
+
+async def bench_connections(manager: str, clients: int, rooms: int) -> Dict[str, Any]:
+    sio_app = FastAPISIO(
+        app=FastAPI(), asyncapi_url=None, client_manager=MANAGERS[manager]()
+    )
+    # Clients of the benchmark never ping, keep them connected
+    sio_app._sio.eio.ping_interval = 3600
+
+    gc.collect()
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+
+    sids: List[str] = []
+    for index in range(clients):
+        client = InProcessClient(sio_app)
+        await client.connect()
+        assert client.sid is not None
+        # Every client is a member of two rooms, named like in the apps
+        await sio_app.enter_room(client.sid, f"fleet-{index % rooms}")
+        await sio_app.enter_room(client.sid, f"area-{index % (rooms // 10 or 1)}")
+        sids.append(client.sid)
+
+    gc.collect()
+    used_memory = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    start = perf_counter()
+    for sid in sids:
+        await sio_app.disconnect(sid)
+    disconnect_seconds = perf_counter() - start
+
+    return {
+        "manager": manager,
+        "clients": clients,
+        "bytes_per_connection": used_memory / clients,
+        "disconnect_all_seconds": disconnect_seconds,
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    return [
+        await bench_connections(manager, clients, args.rooms)
+        for clients in args.clients
+        for manager in args.managers
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument(
+        "--managers", nargs="+", choices=MANAGERS, default=["SIOAsyncManager"]
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
@@ -0,0 +1,108 @@
+"""
+Per-message overhead of cross-cutting hooks (auth check, tracing, payload
+validation and handler metrics) applied as a stack of decorators on the
+handler, compared with the same hooks compiled into a single dispatch
+function as `SIOMiddleware`.
+
+    python -m benchmarks.middleware --messages 100000
+"""
+
+import argparse
+import asyncio
+import json
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from pydantic import BaseModel
+
+from fastapi_sio.handlers import validating_handler
+from fastapi_sio.metrics import HandlerMetrics, instrumented_handler
+from fastapi_sio.middleware import HandlerContext, SIOMiddleware, compile_dispatch
+
+
+class PositionModel(BaseModel):
+    drone_id: int
+    latitude: float
+    longitude: float
+
+
+PAYLOAD = {"drone_id": 7, "latitude": 50.08, "longitude": 14.42}
+AUTHORIZED = {"sid"}
+TRACES: list[str] = []
+
+
+async def handle_position(sid, data):
+    return data.drone_id
+
+
+def authorized(fn: Callable) -> Callable:
+    @wraps(fn)
+    async def handler(sid, *args):
+        if sid not in AUTHORIZED:
+            return {"error": "unauthorized"}
+        return await fn(sid, *args)
+
+    return handler
+
+
+def traced(fn: Callable) -> Callable:
+    @wraps(fn)
+    async def handler(sid, *args):
+        TRACES.append(sid)
+        return await fn(sid, *args)
+
+    return handler
+
+
+class AuthMiddleware(SIOMiddleware):
+    def before(self, context: HandlerContext) -> Any:
+        if context.sid not in AUTHORIZED:
+            return {"error": "unauthorized"}
+
+
+class TracingMiddleware(SIOMiddleware):
+    def before(self, context: HandlerContext) -> Any:
+        TRACES.append(context.sid)
+
+
+async def dispatch_messages(handler: Callable, messages: int) -> float:
+    start = perf_counter()
+    for _ in range(messages):
+        await handler("sid", PAYLOAD)
+    return perf_counter() - start
+
+
+async def bench_middleware(messages: int) -> Dict[str, Any]:
+    handlers = {
+        "decorators": instrumented_handler(
+            traced(authorized(validating_handler(handle_position, PositionModel))),
+            HandlerMetrics(),
+        ),
+        "middleware": compile_dispatch(
+            handle_position,
+            [TracingMiddleware(), AuthMiddleware()],
+            "position",
+            model=PositionModel,
+            metrics=HandlerMetrics(),
+        ),
+    }
+
+    results: Dict[str, Any] = {}
+    for name, handler in handlers.items():
+        # Best of the repeats, the least disturbed by other processes
+        seconds = min([await dispatch_messages(handler, messages) for _ in range(5)])
+        results[name] = {
+            "messages_per_second": messages / seconds,
+            "us_per_message": seconds / messages * 1e6,
+        }
+        TRACES.clear()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(bench_middleware(args.messages)), indent=2))
@@ -0,0 +1,222 @@
+"""
+Benchmarks of the hot paths: emitting to connected clients, handler
+dispatch through the ASGI app, connection storms and AsyncAPI
+generation. Results are printed as JSON, so they can be stored
+and compared between revisions.
+
+    python -m benchmarks.suite --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI
+from pydantic import BaseModel, create_model
+
+from benchmarks.client import InProcessClient
+from fastapi_sio import FastAPISIO
+
+
+class SmallModel(BaseModel):
+    id: int
+    name: str
+
+
+class LargeModel(BaseModel):
+    id: int
+    values: List[float]
+    labels: Dict[str, str]
+
+
+class NestedPoint(BaseModel):
+    lat: float
+    lon: float
+    timestamp: datetime
+
+
+class NestedModel(BaseModel):
+    id: str
+    position: NestedPoint
+    history: List[NestedPoint]
+
+
+PAYLOADS: Dict[str, Callable[[], BaseModel]] = {
+    "small": lambda: SmallModel(id=1, name="drone"),
+    "large": lambda: LargeModel(
+        id=1,
+        values=[float(i) for i in range(1000)],
+        labels={f"label_{i}": str(i) for i in range(100)},
+    ),
+    "nested": lambda: NestedModel(
+        id="dt-0001",
+        position=NestedPoint(lat=50.08, lon=14.42, timestamp=datetime.now()),
+        history=[
+            NestedPoint(lat=50.08, lon=14.42, timestamp=datetime.now())
+            for _ in range(50)
+        ],
+    ),
+}
+
+
+def create_app(**kwargs) -> FastAPISIO:
+    return FastAPISIO(app=FastAPI(), asyncapi_url=None, **kwargs)
+
+
+async def connect_clients(sio_app: FastAPISIO, count: int) -> List[InProcessClient]:
+    clients = [InProcessClient(sio_app) for _ in range(count)]
+    for client in clients:
+        await client.connect()
+    return clients
+
+
+def drain_queues(sio_app: FastAPISIO):
+    for socket in sio_app._sio.eio.sockets.values():
+        while not socket.queue.empty():
+            socket.queue.get_nowait()
+            socket.queue.task_done()
+
+
+async def bench_emit(clients: int, emits: int) -> List[Dict[str, Any]]:
+    results = []
+    for name, make_payload in PAYLOADS.items():
+        for pre_encode in (False, True):
+            sio_app = create_app()
+            emitter = sio_app.create_emitter(
+                name, model=type(make_payload()), pre_encode=pre_encode
+            )
+            await connect_clients(sio_app, clients)
+            payload = make_payload()
+
+            elapsed = 0.0
+            for _ in range(emits):
+                start = perf_counter()
+                await emitter.emit(payload)
+                elapsed += perf_counter() - start
+                drain_queues(sio_app)
+
+            results.append(
+                {
+                    "payload": name,
+                    "pre_encode": pre_encode,
+                    "clients": clients,
+                    "emits_per_second": emits / elapsed,
+                    "deliveries_per_second": emits * clients / elapsed,
+                }
+            )
+    return results
+
+
+async def bench_room_fanout(clients: int, rooms: int) -> Dict[str, Any]:
+    """
+    Emits one payload to many overlapping rooms, room by room
+    and with a single `emit_many` call.
+    """
+    payload = PAYLOADS["large"]()
+    sio_app = create_app()
+    emitter = sio_app.create_emitter("alert", model=type(payload), pre_encode=True)
+    connected = await connect_clients(sio_app, clients)
+    for index, client in enumerate(connected):
+        # Every client is a member of two rooms
+        for room in (index % rooms, (index + 1) % rooms):
+            await sio_app.enter_room(client.sid, f"room_{room}")
+
+    room_names = [f"room_{room}" for room in range(rooms)]
+
+    start = perf_counter()
+    for room in room_names:
+        await emitter.emit(payload, to=room)
+    per_room = perf_counter() - start
+    drain_queues(sio_app)
+
+    start = perf_counter()
+    await emitter.emit_many(payload, rooms=room_names)
+    bulk = perf_counter() - start
+    drain_queues(sio_app)
+
+    return {
+        "clients": clients,
+        "rooms": rooms,
+        "per_room_seconds": per_room,
+        "emit_many_seconds": bulk,
+    }
+
+
+async def bench_handler_dispatch(calls: int) -> Dict[str, Any]:
+    sio_app = create_app()
+
+    @sio_app.on("ping", model=SmallModel, validate=True)
+    async def ping(sid, data: SmallModel):
+        return data.id
+
+    (client,) = await connect_clients(sio_app, 1)
+    latencies = []
+    for _ in range(calls):
+        start = perf_counter()
+        await client.call("ping", {"id": 1, "name": "drone"})
+        latencies.append(perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "calls": calls,
+        "mean_seconds": sum(latencies) / calls,
+        "p50_seconds": latencies[calls // 2],
+        "p99_seconds": latencies[int(calls * 0.99)],
+    }
+
+
+async def bench_connection_storm(clients: int) -> Dict[str, Any]:
+    sio_app = create_app()
+    start = perf_counter()
+    await asyncio.gather(*(InProcessClient(sio_app).connect() for _ in range(clients)))
+    elapsed = perf_counter() - start
+    return {"clients": clients, "connections_per_second": clients / elapsed}
+
+
+def bench_asyncapi(events: int) -> Dict[str, Any]:
+    sio_app = FastAPISIO(app=FastAPI())
+
+    for index in range(events):
+        model = create_model(f"Model{index}", id=(int, ...), name=(str, ...))
+        sio_app.create_emitter(f"emitter_{index}", model=model)
+        sio_app.on(f"handler_{index}", model=model)(lambda sid, data: None)
+
+    start = perf_counter()
+    sio_app.asyncapi_schema = None
+    sio_app.asyncapi()
+    elapsed = perf_counter() - start
+    return {"events": events * 2, "seconds": elapsed}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "timestamp": datetime.now().isoformat(),
+        "emit": await bench_emit(args.clients, args.emits),
+        "room_fanout": await bench_room_fanout(args.clients, args.rooms),
+        "handler_dispatch": await bench_handler_dispatch(args.calls),
+        "connection_storm": await bench_connection_storm(args.storm),
+        "asyncapi": bench_asyncapi(args.events),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--emits", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--storm", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--output", help="File to write the JSON results to")
+    args = parser.parse_args()
+
+    results = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(results)
+    print(results)
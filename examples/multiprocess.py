@@ -0,0 +1,112 @@
+"""
+Spins up several uvicorn worker processes sharing clients through
+`AsyncUnixSocketManager` and verifies that an emit done in one of
+them is delivered to clients connected to all the others.
+
+    python -m examples.multiprocess
+"""
+
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+
+import aiohttp
+import socketio
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio.managers import AsyncUnixSocketManager
+
+WORKERS = 4
+BASE_PORT = 8700
+
+
+class AnnouncementModel(BaseModel):
+    text: str
+    worker: int
+
+
+def create_app(worker: int, sockets_path: str) -> FastAPI:
+    fastapi_app = FastAPI()
+    sio_app = FastAPISIO(
+        app=fastapi_app,
+        client_manager=AsyncUnixSocketManager(path=sockets_path),
+    )
+    announcements = sio_app.create_emitter("announcements", model=AnnouncementModel)
+
+    @fastapi_app.post("/announce")
+    async def announce():
+        await announcements.emit(AnnouncementModel(text="Hello", worker=worker))
+
+    return fastapi_app
+
+
+def run_worker(worker: int, sockets_path: str):
+    uvicorn.run(
+        create_app(worker, sockets_path),
+        port=BASE_PORT + worker,
+        log_level="warning",
+    )
+
+
+async def wait_for_worker(session: aiohttp.ClientSession, port: int):
+    for _ in range(100):
+        try:
+            async with session.get(f"http://127.0.0.1:{port}/sio/docs/asyncapi.json"):
+                return
+        except aiohttp.ClientConnectionError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Worker on port {port} did not start")
+
+
+async def check_delivery() -> bool:
+    received: dict[int, list] = {worker: [] for worker in range(WORKERS)}
+    clients = []
+
+    async with aiohttp.ClientSession() as session:
+        for worker in range(WORKERS):
+            await wait_for_worker(session, BASE_PORT + worker)
+
+            client = socketio.AsyncClient()
+            client.on("announcements", received[worker].append)
+            await client.connect(
+                f"http://127.0.0.1:{BASE_PORT + worker}",
+                socketio_path="/sio/socket.io",
+            )
+            clients.append(client)
+
+        # Give the workers' managers a moment to start listening
+        await asyncio.sleep(0.5)
+        async with session.post(f"http://127.0.0.1:{BASE_PORT}/announce"):
+            pass
+        await asyncio.sleep(0.5)
+
+    for client in clients:
+        await client.disconnect()
+
+    for worker, messages in received.items():
+        print(f"worker {worker}: {messages}")
+    return all(len(messages) == 1 for messages in received.values())
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as sockets_path:
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(worker, sockets_path))
+            for worker in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            delivered = asyncio.run(check_delivery())
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join()
+
+    print("OK" if delivered else "FAILED")
+    sys.exit(0 if delivered else 1)
@@ -1,2 +1,14 @@
 from .applications import FastAPISIO
-from .schemas.asyncapi import AsyncAPIServer
\ No newline at end of file
+from .actors import BatchPolicy, DeltaPolicy, ReplayPolicy
+from .dependencies import Depends
+from .middleware import HandlerContext, SIOMiddleware
+from .server import OutboundQueuePolicy
+
+
+def __getattr__(name: str):
+    # Schema models are not needed to run the server, import them on demand
+    if name == "AsyncAPIServer":
+        from .schemas.asyncapi import AsyncAPIServer
+
+        return AsyncAPIServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,49 @@
-from typing import Any, Generic, Optional, Type, TypeVar
-from pydantic import BaseModel
-from socketio import AsyncServer
+import asyncio
+import json
+from contextvars import ContextVar
+from functools import lru_cache
+from time import monotonic, perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from socketio.exceptions import TimeoutError as SIOTimeoutError
 from fastapi.encoders import jsonable_encoder
 
+from fastapi_sio.deltas import json_patch, merge_patch
+from fastapi_sio.metrics import EmitterMetrics
+from fastapi_sio.packets import RawJSON, SIOJsonPacket, encode_event
+from fastapi_sio.replay import ReplayBuffer
+
+if TYPE_CHECKING:
+    # Server module depends on the current emitter defined here
+    from fastapi_sio.server import SIOAsyncServer
+
 T = TypeVar("T", bound=BaseModel)
 
+# Emitter currently sending a message, lets the server attribute
+# messages dropped by the outbound queue policy to the emitter
+current_emitter: ContextVar["SIOJsonEmitter | None"] = ContextVar(
+    "current_emitter", default=None
+)
+
 
 class SIOActorMeta(BaseModel):
     event: str
+    namespace: str = "/"
     title: str | None = None
     summary: str | None = None
     description: str | None = None
@@ -16,6 +52,56 @@ class SIOActorMeta(BaseModel):
     message_description: str | None = None
 
 
+class BatchPolicy(BaseModel):
+    """
+    Payloads emitted to the same target are collected and sent
+    as a single array event once `max_items` payloads are pending
+    or `max_delay_ms` passed since the first of them.
+    """
+
+    max_items: int = Field(default=100, gt=0)
+    max_delay_ms: float = Field(default=50, ge=0)
+
+
+class DeltaPolicy(BaseModel):
+    """
+    Only the first payload emitted to a target (room, sid, ...) is sent
+    in full, following ones are sent as patches of the previous one
+    in the `{event}:patch` event, either as a JSON Merge Patch (RFC 7396)
+    or a JSON Patch (RFC 6902). Full snapshot is sent again every
+    `resync_interval` seconds, to clients joining the target and to
+    clients requesting it with the `{event}:resync` event.
+
+    Snapshots carry their version as the second argument, patches their
+    version and the version they apply to, so clients can detect a lost
+    or foreign patch and request a resync.
+    """
+
+    format: Literal["merge-patch", "json-patch"] = "merge-patch"
+    resync_interval: float = Field(default=30, gt=0)
+
+
+# Suffix of the event carrying patches of a delta emitter
+PATCH_EVENT_SUFFIX = ":patch"
+# Suffix of the event clients of a delta emitter request snapshots with
+RESYNC_EVENT_SUFFIX = ":resync"
+
+
+class ReplayPolicy(BaseModel):
+    """
+    Last `size` messages, not older than `ttl` seconds, are kept encoded
+    and sent again to clients reconnecting with the sequence number
+    of the last message they have received.
+    """
+
+    size: int = Field(default=1000, gt=0)
+    ttl: float | None = Field(default=None, gt=0)
+
+
+# Suffix of the event telling a resuming client that messages were lost
+REPLAY_GAP_EVENT_SUFFIX = ":gap"
+
+
 class SIOEmitterMeta(SIOActorMeta):
     # TODO: Currently impossible to import AbstractSetIntStr, MappingIntStrAny
     # from pydantic
@@ -25,35 +111,685 @@ class SIOEmitterMeta(SIOActorMeta):
     exclude_unset: bool = False
     exclude_defaults: bool = False
     exclude_none: bool = False
+    batch: BatchPolicy | None = None
+    delta: DeltaPolicy | None = None
+    replay: ReplayPolicy | None = None
+
+
+ENCODER_OPTIONS = {
+    "include",
+    "exclude",
+    "by_alias",
+    "exclude_unset",
+    "exclude_defaults",
+    "exclude_none",
+}
+
+
+class CallResults:
+    """
+    Outcome of `SIOJsonEmitter.call_many`. Clients which did not
+    acknowledge in time are listed in `timed_out`, acknowledgements
+    not matching the `ack_model` are kept in `invalid`, errors raised
+    by calls of the other clients in `failed`.
+    """
+
+    __slots__ = ("acks", "timed_out", "invalid", "failed")
+
+    def __init__(self):
+        self.acks: Dict[str, Any] = {}
+        self.timed_out: List[str] = []
+        self.invalid: Dict[str, ValidationError] = {}
+        self.failed: Dict[str, Exception] = {}
+
+
+@lru_cache(maxsize=256)
+def get_ack_adapter(ack_model: Any) -> TypeAdapter:
+    """
+    Adapter validating acknowledgements, built once per `ack_model`.
+    """
+    return TypeAdapter(ack_model)
 
 
 class SIOJsonEmitter(Generic[T]):
-    def __init__(self, model: Type[T], meta: SIOEmitterMeta, sio: AsyncServer):
+    def __init__(
+        self,
+        model: Type[T],
+        meta: SIOEmitterMeta,
+        sio: "SIOAsyncServer",
+        pre_encode: bool = False,
+    ):
         self._meta = meta
         self._model = model
         self._sio = sio
+        self._encode_args = meta.model_dump(include=ENCODER_OPTIONS)
+        self._pre_encode = pre_encode
+
+        # Pre-encoded JSON is spliced into the packet by `SIOJsonPacket` only,
+        # other serializers (MessagePack) get JSON-compatible python objects
+        self._raw_json = pre_encode and issubclass(sio.packet_class, SIOJsonPacket)
+
+        self._replay = (
+            ReplayBuffer(meta.replay.size, meta.replay.ttl)
+            if meta.replay is not None
+            else None
+        )
+
+        self.dropped_messages = 0
+        self.metrics: EmitterMetrics | None = None
 
     def get_meta(self):
         return self._meta
 
-    async def emit(self, payload: T, encode_kwargs={}, **kwargs):
-        meta_args = self._meta.model_dump(
-            include={
-                "include",
-                "exclude",
-                "by_alias",
-                "exclude_unset",
-                "exclude_defaults",
-                "exclude_none",
-            }
-        )
-
-        await self._sio.emit(
-            self._meta.event,
-            data=jsonable_encoder(payload, **(meta_args | encode_kwargs)),
+    def encode(self, payload: T, encode_kwargs={}) -> Any:
+        """
+        Encodes the payload into the data handed to the Socket.IO server.
+        """
+        encode_args = self._encode_args
+        if encode_kwargs:
+            encode_args = encode_args | encode_kwargs
+
+        if self.metrics is None:
+            return self._encode(payload, encode_args)
+
+        start = perf_counter()
+        data = self._encode(payload, encode_args)
+        self.metrics.encode_duration.observe(perf_counter() - start)
+        return data
+
+    def _encode(self, payload: T, encode_args: Dict[str, Any]) -> Any:
+        if self._pre_encode and isinstance(payload, BaseModel):
+            if self._raw_json:
+                return RawJSON(payload.model_dump_json(**encode_args))
+            return payload.model_dump(mode="json", **encode_args)
+
+        return jsonable_encoder(payload, **encode_args)
+
+    async def emit(
+        self,
+        payload: T,
+        encode_kwargs={},
+        to: str | List[str] | None = None,
+        room: str | List[str] | None = None,
+        skip_sid: str | List[str] | None = None,
+        namespace: str | None = None,
+        **kwargs,
+    ):
+        """
+        Emits the payload to a client (by its sid), a room or a list of
+        rooms given in `to` (or its alias `room`), to all clients of the
+        namespace by default.
+        """
+        await self._emit(
+            self.encode(payload, encode_kwargs),
+            to=to or room,
+            skip_sid=skip_sid,
+            namespace=namespace,
             **kwargs,
         )
 
+    async def emit_many(
+        self,
+        payload: T,
+        rooms: Iterable[str],
+        skip_sid: str | List[str] | None = None,
+        encode_kwargs={},
+        **kwargs,
+    ):
+        """
+        Emits the payload to all the rooms at once. The payload is encoded
+        once and clients present in several rooms receive it only once.
+        """
+        rooms = list(rooms)
+        # Empty target would broadcast to the whole namespace
+        if not rooms:
+            return
+
+        await self.emit(payload, encode_kwargs, to=rooms, skip_sid=skip_sid, **kwargs)
+
+    async def call(
+        self,
+        payload: T,
+        to: str,
+        ack_model: Type[Any] | None = None,
+        timeout: float = 60,
+        namespace: str | None = None,
+        encode_kwargs={},
+    ) -> Any:
+        """
+        Emits the payload to a single client and waits for its acknowledgement,
+        validated into `ack_model` if given. Raises `socketio.exceptions.TimeoutError`
+        when the client does not acknowledge within `timeout` seconds.
+        """
+        ack = await self._call(
+            self.encode(payload, encode_kwargs), to, namespace, timeout
+        )
+        if ack_model is None:
+            return ack
+        return get_ack_adapter(ack_model).validate_python(ack)
+
+    async def call_many(
+        self,
+        payload: T,
+        to: Iterable[str],
+        ack_model: Type[Any] | None = None,
+        timeout: float = 60,
+        max_concurrency: int = 100,
+        namespace: str | None = None,
+        encode_kwargs={},
+    ) -> CallResults:
+        """
+        Emits the payload to each of the clients and collects their
+        acknowledgements, with at most `max_concurrency` calls pending at once.
+        All calls share the `timeout` deadline, acknowledgements received until
+        then are returned, the remaining clients are reported as timed out.
+        Any other error of a call is reported for its client only.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency has to be at least 1")
+
+        data = self.encode(payload, encode_kwargs)
+        adapter = get_ack_adapter(ack_model) if ack_model is not None else None
+        results = CallResults()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        sids = iter(to)
+
+        async def worker():
+            # Workers share the iterator, each takes the next sid when idle
+            for sid in sids:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    results.timed_out.append(sid)
+                    continue
+                try:
+                    ack = await self._call(data, sid, namespace, remaining)
+                    if adapter is not None:
+                        ack = adapter.validate_python(ack)
+                except SIOTimeoutError:
+                    results.timed_out.append(sid)
+                except ValidationError as error:
+                    results.invalid[sid] = error
+                # A failing client must not lose acknowledgements of the others
+                except Exception as error:
+                    results.failed[sid] = error
+                else:
+                    results.acks[sid] = ack
+
+        await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+        return results
+
+    async def _call(
+        self, data: Any, to: str, namespace: str | None, timeout: float
+    ) -> Any:
+        if self.metrics is not None:
+            self.metrics.messages += 1
+
+        token = current_emitter.set(self)
+        try:
+            return await self._sio.call(
+                self._meta.event,
+                data=data,
+                to=to,
+                namespace=namespace or self._meta.namespace,
+                # Annotated as int by python-socketio, fractions work as well
+                timeout=timeout,  # type: ignore
+            )
+        finally:
+            current_emitter.reset(token)
+
+    async def _emit(
+        self,
+        data: Any,
+        namespace: str | None = None,
+        event: str | None = None,
+        **kwargs,
+    ):
+        if self.metrics is not None:
+            self.metrics.messages += 1
+
+        namespace = namespace or self._meta.namespace
+        if self._replay is not None:
+            # Sequence number is sent as the second argument of the event
+            seq = self._replay.append(
+                data, namespace, kwargs.get("to"), kwargs.get("skip_sid")
+            )
+            data = (data, seq)
+
+        token = current_emitter.set(self)
+        try:
+            await self._sio.emit(
+                event or self._meta.event,
+                data=data,
+                namespace=namespace,
+                **kwargs,
+            )
+        finally:
+            current_emitter.reset(token)
+
+    async def replay(self, sid: str, seq: int, namespace: str | None = None) -> bool:
+        """
+        Sends the client messages following the `seq` one it would have
+        received, being in the rooms it is in now. When some of them are
+        no longer kept, the `{event}:gap` event with the last sequence number
+        is sent first. Returns whether no messages were lost.
+        """
+        if self._replay is None:
+            raise ValueError("Emitter does not keep messages for replay")
+
+        namespace = namespace or self._meta.namespace
+        messages, complete = self._replay.since(seq)
+        if not complete:
+            await self._sio.emit(
+                self._meta.event + REPLAY_GAP_EVENT_SUFFIX,
+                data=self._replay.seq,
+                to=sid,
+                namespace=namespace,
+            )
+
+        eio_sid = self._sio.manager.eio_sid_from_sid(sid, namespace)
+        if eio_sid is None:
+            return complete
+        rooms = self._sio.manager.get_rooms(sid, namespace)
+
+        token = current_emitter.set(self)
+        try:
+            for message in messages:
+                if message.namespace != namespace or not message.is_for(sid, rooms):
+                    continue
+                # Encoded once, no matter how many clients resume
+                if message.eio_pkts is None:
+                    message.eio_pkts = encode_event(
+                        self._sio.packet_class,
+                        namespace,
+                        self._meta.event,
+                        [message.data, message.seq],
+                    )
+                    message.data = None
+                for eio_pkt in message.eio_pkts:
+                    await self._sio._send_eio_packet(eio_sid, eio_pkt)
+        finally:
+            current_emitter.reset(token)
+        return complete
+
+    async def resume(self, sid: str, namespace: str, auth: Any):
+        """
+        Replays messages to a client connecting with the last received
+        sequence numbers of emitters in its auth, e.g. `{"replay": {"fleet": 42}}`.
+        """
+        if namespace != self._meta.namespace or not isinstance(auth, dict):
+            return
+        sequences = auth.get("replay")
+        if not isinstance(sequences, dict):
+            return
+        seq = sequences.get(self._meta.event)
+        if isinstance(seq, int) and not isinstance(seq, bool):
+            await self.replay(sid, seq, namespace)
+
+
+def freeze_kwargs(kwargs: Dict[str, Any]) -> Hashable:
+    """
+    Turns emit keyword arguments (`to`, `room`, `skip_sid`, ...)
+    into a hashable key identifying the target of an emit.
+    """
+    return tuple(
+        sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in kwargs.items()
+        )
+    )
+
+
+class SIOBatchingEmitter(SIOJsonEmitter[T]):
+    def __init__(
+        self,
+        model: Type[T],
+        meta: SIOEmitterMeta,
+        sio: "SIOAsyncServer",
+        batch: BatchPolicy,
+        pre_encode: bool = False,
+    ):
+        super().__init__(model=model, meta=meta, sio=sio, pre_encode=pre_encode)
+        self._batch = batch
+        self._buffers: Dict[Hashable, List[Any]] = {}
+        self._targets: Dict[Hashable, Dict[str, Any]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def emit(
+        self,
+        payload: T,
+        encode_kwargs={},
+        to: str | List[str] | None = None,
+        room: str | List[str] | None = None,
+        skip_sid: str | List[str] | None = None,
+        namespace: str | None = None,
+        **kwargs,
+    ):
+        kwargs.update(to=to or room, skip_sid=skip_sid, namespace=namespace)
+        key = freeze_kwargs(kwargs)
+        buffer = self._buffers.get(key)
+
+        if buffer is None:
+            buffer = self._buffers[key] = []
+            self._targets[key] = kwargs
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self._batch.max_delay_ms / 1000, self._schedule_flush, key
+            )
+
+        buffer.append(self.encode(payload, encode_kwargs))
+
+        if len(buffer) >= self._batch.max_items:
+            await self._flush(key)
+
+    async def flush(self):
+        """
+        Immediately sends all pending batches.
+        """
+        for key in list(self._buffers):
+            await self._flush(key)
+
+    def _schedule_flush(self, key: Hashable):
+        task = asyncio.ensure_future(self._flush(key))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, key: Hashable):
+        buffer = self._buffers.pop(key, None)
+        kwargs = self._targets.pop(key, {})
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if not buffer:
+            return
+
+        await self._emit(self._pack(buffer), **kwargs)
+
+    def _pack(self, buffer: List[Any]) -> Any:
+        if not self._raw_json:
+            return buffer
+
+        return RawJSON(
+            "["
+            + ",".join(
+                item.json if isinstance(item, RawJSON) else json.dumps(item)
+                for item in buffer
+            )
+            + "]"
+        )
+
+
+class SIOConflatingEmitter(SIOJsonEmitter[T]):
+    """
+    Keeps only the newest unsent payload per `key` for each recipient.
+    Payloads are sent to a recipient while fewer than `max_queued` packets
+    wait in its Engine.IO outbound queue, and once it is drained again,
+    so slow clients skip superseded values.
+
+    Recipients are resolved through the local client manager only.
+    """
+
+    def __init__(
+        self,
+        model: Type[T],
+        meta: SIOEmitterMeta,
+        sio: "SIOAsyncServer",
+        key: Callable[[T], Hashable],
+        pre_encode: bool = False,
+        max_queued: int = 1,
+        poll_interval: float = 0.01,
+    ):
+        super().__init__(model=model, meta=meta, sio=sio, pre_encode=pre_encode)
+        self._key = key
+        self._max_queued = max_queued
+        self._poll_interval = poll_interval
+        self._pending: Dict[Tuple[str, str], Dict[Hashable, Any]] = {}
+        self._drainers: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def emit(
+        self,
+        payload: T,
+        encode_kwargs={},
+        to: str | List[str] | None = None,
+        room: str | List[str] | None = None,
+        skip_sid: str | List[str] | None = None,
+        namespace: str | None = None,
+        **kwargs,
+    ):
+        namespace = namespace or self._meta.namespace
+        skip_sids = skip_sid if isinstance(skip_sid, list) else [skip_sid]
+        key = self._key(payload)
+        data = self.encode(payload, encode_kwargs)
+
+        for sid, eio_sid in self._sio.manager.get_participants(namespace, to or room):
+            if sid in skip_sids:
+                continue
+
+            recipient = (namespace, sid)
+            pending = self._pending.setdefault(recipient, {})
+            # Re-inserting moves the key to the end, superseded value is dropped
+            pending.pop(key, None)
+            pending[key] = data
+
+            if recipient not in self._drainers:
+                self._drainers[recipient] = asyncio.ensure_future(
+                    self._drain(recipient, eio_sid, kwargs)
+                )
+
+    def pending_count(self) -> int:
+        """
+        Number of payloads waiting to be sent across all recipients.
+        """
+        return sum(len(pending) for pending in self._pending.values())
+
+    async def _drain(
+        self, recipient: Tuple[str, str], eio_sid: str, kwargs: Dict[str, Any]
+    ):
+        namespace, sid = recipient
+        try:
+            while self._pending.get(recipient):
+                socket = self._sio.eio.sockets.get(eio_sid)
+                if socket is None or socket.closed:
+                    break
+                if socket.queue.qsize() >= self._max_queued:
+                    # Woken as soon as the writer takes the queued packets,
+                    # the timeout only rechecks whether the socket was closed
+                    try:
+                        await asyncio.wait_for(socket.queue.join(), self._poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                pending = self._pending[recipient]
+                key = next(iter(pending))
+                data = pending.pop(key)
+                await self._emit(data, to=sid, namespace=namespace, **kwargs)
+        finally:
+            self._pending.pop(recipient, None)
+            self._drainers.pop(recipient, None)
+
+
+class DeltaState:
+    """
+    Last payload sent to a target of the delta emitter, and its version.
+    """
+
+    __slots__ = ("snapshot", "version", "resync_at")
+
+    def __init__(self, snapshot: Dict[str, Any], version: int, resync_at: float):
+        self.snapshot = snapshot
+        self.version = version
+        self.resync_at = resync_at
+
+
+class SIODeltaEmitter(SIOJsonEmitter[T]):
+    """
+    Sends patches of the payload last sent to the same target, see
+    `DeltaPolicy`. Clients are expected to follow a single target
+    of the emitter, applying patches to the snapshot they received last.
+    Versions are shared by all targets, so a client receiving patches
+    of several targets sees them as not applying to its version.
+
+    Snapshots are kept in the process, with multiple workers every
+    payload of a target has to be emitted from the same process.
+    """
+
+    # States of targets without participants are pruned once there are this many
+    PRUNE_THRESHOLD = 1024
+
+    def __init__(
+        self,
+        model: Type[T],
+        meta: SIOEmitterMeta,
+        sio: "SIOAsyncServer",
+        delta: DeltaPolicy,
+        pre_encode: bool = False,
+    ):
+        super().__init__(model=model, meta=meta, sio=sio, pre_encode=pre_encode)
+        self._delta = delta
+        self._diff = merge_patch if delta.format == "merge-patch" else json_patch
+        self._patch_event = meta.event + PATCH_EVENT_SUFFIX
+        self._states: Dict[Tuple[str, Hashable], DeltaState] = {}
+        self._version = 0
+        self._prune_at = self.PRUNE_THRESHOLD
+
+    def _encode(self, payload: T, encode_args: Dict[str, Any]) -> Any:
+        # Patches are computed from JSON-compatible python objects
+        if isinstance(payload, BaseModel):
+            return payload.model_dump(mode="json", **encode_args)
+        return jsonable_encoder(payload, **encode_args)
+
+    async def emit(
+        self,
+        payload: T,
+        encode_kwargs={},
+        to: str | List[str] | None = None,
+        room: str | List[str] | None = None,
+        skip_sid: str | List[str] | None = None,
+        namespace: str | None = None,
+        **kwargs,
+    ):
+        # Skipped clients would apply following patches to a stale snapshot
+        if skip_sid is not None:
+            raise ValueError("Delta emitter cannot skip clients")
+
+        namespace = namespace or self._meta.namespace
+        target = to or room
+        key = (namespace, tuple(target) if isinstance(target, list) else target)
+        data = self.encode(payload, encode_kwargs)
+        state = self._states.get(key)
+        now = monotonic()
+
+        if state is None or now >= state.resync_at:
+            if state is None and len(self._states) >= self._prune_at:
+                self._prune()
+            self._version += 1
+            self._states[key] = DeltaState(
+                data, self._version, now + self._delta.resync_interval
+            )
+            await self._emit(
+                (data, self._version), to=target, namespace=namespace, **kwargs
+            )
+            return
+
+        patch = self._diff(state.snapshot, data)
+        state.snapshot = data
+        if patch:
+            self._version += 1
+            base, state.version = state.version, self._version
+            await self._emit(
+                (patch, state.version, base),
+                to=target,
+                namespace=namespace,
+                event=self._patch_event,
+                **kwargs,
+            )
+
+    async def resync(
+        self,
+        to: str | List[str] | None = None,
+        sid: str | None = None,
+        namespace: str | None = None,
+    ):
+        """
+        Sends the last snapshot of the target `to` again, to the client `sid`
+        only if given. Nothing is sent if there was no payload emitted yet.
+        """
+        namespace = namespace or self._meta.namespace
+        key = (namespace, tuple(to) if isinstance(to, list) else to)
+        state = self._states.get(key)
+        if state is not None:
+            await self._emit(
+                (state.snapshot, state.version), to=sid or to, namespace=namespace
+            )
+
+    async def joined(self, sid: str, namespace: str, room: str | None):
+        """
+        Sends the snapshot of the room (or the whole namespace, when `room`
+        is `None`) to the client which has just joined it.
+        """
+        if namespace == self._meta.namespace and (namespace, room) in self._states:
+            await self.resync(to=room, sid=sid, namespace=namespace)
+
+    async def resync_requested(self, sid: str, *args):
+        """
+        Handles the `{event}:resync` event, sending the client snapshots
+        of all the targets it follows.
+        """
+        namespace = self._meta.namespace
+        rooms = set(self._sio.manager.get_rooms(sid, namespace))
+        if not rooms:
+            return
+        for (state_namespace, target), state in list(self._states.items()):
+            targets = target if isinstance(target, tuple) else (target,)
+            if state_namespace == namespace and (
+                target is None or not rooms.isdisjoint(targets)
+            ):
+                await self._emit(
+                    (state.snapshot, state.version), to=sid, namespace=namespace
+                )
+
+    def _prune(self):
+        manager = self._sio.manager
+        self._states = {
+            (namespace, target): state
+            for (namespace, target), state in self._states.items()
+            if next(iter(manager.get_participants(namespace, target)), None) is not None
+        }
+        self._prune_at = max(self.PRUNE_THRESHOLD, 2 * len(self._states))
+
+
+def make_emitter(
+    model: Type[T],
+    meta: SIOEmitterMeta,
+    sio: "SIOAsyncServer",
+    pre_encode: bool = False,
+    conflate: Callable[[T], Hashable] | None = None,
+) -> SIOJsonEmitter[T]:
+    """
+    Instantiates the emitter class matching given options.
+    """
+    if (meta.batch is not None) + (conflate is not None) + (meta.delta is not None) > 1:
+        raise ValueError("Emitter can either batch, conflate or send deltas")
+    # Replayed messages have to be complete and meant for the client's rooms
+    if meta.replay is not None and (conflate is not None or meta.delta is not None):
+        raise ValueError("Conflating and delta emitters cannot replay messages")
+
+    if meta.batch is not None:
+        return SIOBatchingEmitter(
+            model=model, meta=meta, sio=sio, batch=meta.batch, pre_encode=pre_encode
+        )
+    if conflate is not None:
+        return SIOConflatingEmitter(
+            model=model, meta=meta, sio=sio, key=conflate, pre_encode=pre_encode
+        )
+    if meta.delta is not None:
+        return SIODeltaEmitter(
+            model=model, meta=meta, sio=sio, delta=meta.delta, pre_encode=pre_encode
+        )
+    return SIOJsonEmitter(model=model, meta=meta, sio=sio, pre_encode=pre_encode)
+
 
 class SIOHandler(SIOActorMeta):
     name: str | None = None
+    rate_limit: List[str] | None = None
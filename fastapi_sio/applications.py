@@ -1,13 +1,58 @@
 from asyncio import AbstractEventLoop
-from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+import json
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
 from pydantic import BaseModel
 import socketio
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
 
-from fastapi_sio.asyncapi import get_asyncapi
-from fastapi_sio.actors import SIOJsonEmitter, SIOEmitterMeta, SIOHandler
-from fastapi_sio.schemas.asyncapi import AsyncAPI, AsyncAPIServer
-from fastapi_sio.utils import find_cors_configuration
+from fastapi_sio.actors import (
+    BatchPolicy,
+    DeltaPolicy,
+    RESYNC_EVENT_SUFFIX,
+    ReplayPolicy,
+    SIODeltaEmitter,
+    SIOJsonEmitter,
+    SIOEmitterMeta,
+    SIOHandler,
+    make_emitter,
+)
+from fastapi_sio.dependencies import (
+    ConnectionDependencies,
+    DependencyGraph,
+    injecting_handler,
+)
+from fastapi_sio.documents import RenderedDocument
+from fastapi_sio.handlers import (
+    HandlerLimiter,
+    RunIn,
+    offloaded_handler,
+)
+from fastapi_sio.managers import SIOAsyncManager
+from fastapi_sio.metrics import SIOMetrics
+from fastapi_sio.middleware import SIOMiddleware, compile_dispatch
+from fastapi_sio.namespaces import SIONamespace
+from fastapi_sio.packets import MEDIA_TYPES, Serializer, get_packet_class
+from fastapi_sio.ratelimit import RateLimiter
+from fastapi_sio.server import OutboundQueuePolicy, SIOAsyncServer
+from fastapi_sio.utils import CORSConfiguration
+
+if TYPE_CHECKING:
+    # Docs machinery is imported on the first spec request
+    from fastapi_sio.asyncapi import AsyncAPIBuilder
+    from fastapi_sio.schemas.asyncapi import AsyncAPI, AsyncAPIServer
+    from fastapi_sio.sessions import SessionBackend, SessionStore
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -42,13 +87,21 @@ class FastAPISIO:
         asyncapi_url: str | None = "/sio/docs",
         version: str | None = None,
         other_asgi_app: bool | None = None,
-        servers: Dict[str, AsyncAPIServer] | None = None,
+        servers: "Dict[str, AsyncAPIServer] | None" = None,
         loop: AbstractEventLoop | None = None,
         monitor_clients: bool = True,
+        serializer: Serializer = "json",
+        client_manager: socketio.AsyncManager | None = None,
+        outbound_queue: OutboundQueuePolicy | None = None,
+        metrics_url: str | None = None,
+        middleware: Sequence[SIOMiddleware] | None = None,
     ):
-        self._sio = socketio.AsyncServer(
+        self._sio = SIOAsyncServer(
             async_mode=async_mode,
-            cors_allowed_origins=find_cors_configuration(app, default=[]),
+            outbound_queue=outbound_queue,
+            client_manager=client_manager or SIOAsyncManager(),
+            serializer=get_packet_class(serializer),
+            cors_configuration=CORSConfiguration(app, default=[]),
             monitor_clients=monitor_clients,
             loop=loop,
         )
@@ -60,38 +113,153 @@ class FastAPISIO:
         self._app = app
         self._handlers: List[SIOHandler] = []
         self._emitters: List[SIOJsonEmitter] = []
+        self._namespaces: Dict[str, SIONamespace] = {}
+        self._middleware: List[SIOMiddleware] = list(middleware or [])
+        self._connection_dependencies: ConnectionDependencies | None = None
         self._servers = servers
+        self._media_type = MEDIA_TYPES[serializer]
 
-        self.asyncapi_schema: AsyncAPI | None = None
+        self.asyncapi_schema: "AsyncAPI | None" = None
+        self._asyncapi_builder: "AsyncAPIBuilder | None" = None
+        self._asyncapi_documents: Dict[str, RenderedDocument] = {}
         self.asyncapi_url = asyncapi_url
         self.version = version
+        self.metrics_url = metrics_url
+        self._metrics = SIOMetrics() if metrics_url is not None else None
 
         # self.make_props_proxies()
 
         if asyncapi_url is not None:
+            self._app.get(asyncapi_url + "/asyncapi.json", include_in_schema=False)(
+                self.asyncapi_json
+            )
+            self._app.get(asyncapi_url + "/asyncapi.yaml", include_in_schema=False)(
+                self.asyncapi_yaml
+            )
+
+        if metrics_url is not None:
             self._app.get(
-                asyncapi_url + "/asyncapi.json",
+                metrics_url,
                 include_in_schema=False,
-                response_model=AsyncAPI,
-                response_model_exclude_none=True,
-            )(self.asyncapi)
+                response_class=PlainTextResponse,
+            )(self.metrics)
 
         app.mount(mount_location, self._asgiapp)
         app.state.sio = self._sio
 
-    def asyncapi(self) -> AsyncAPI:
+    def asyncapi(self) -> "AsyncAPI":
         if not self.asyncapi_schema:
-            self.asyncapi_schema = get_asyncapi(
+            self.asyncapi_schema = self._get_asyncapi_builder().build(
                 id="urn:com:" + "_".join(self._app.title.lower().split(" ")),
                 title=self._app.title,
                 version=self.version or self._app.version,
                 description=self._app.description,
                 servers=self._servers or {},
-                handlers=self._handlers,
-                emitters=[emitter.get_meta() for emitter in self._emitters],
+                defaultContentType=self._media_type,
             )
         return self.asyncapi_schema
 
+    def _get_asyncapi_builder(self) -> "AsyncAPIBuilder":
+        """
+        Builder is created on the first spec request, picking up
+        everything registered until then.
+        """
+        if self._asyncapi_builder is None:
+            from fastapi_sio.asyncapi import AsyncAPIBuilder
+
+            self._asyncapi_builder = AsyncAPIBuilder()
+            for handler in self._handlers:
+                self._asyncapi_builder.add_handler(handler)
+            for emitter in self._emitters:
+                self._asyncapi_builder.add_emitter(emitter.get_meta())
+        return self._asyncapi_builder
+
+    def asyncapi_json(self, request: Request) -> Response:
+        return self._asyncapi_document("json").respond(request)
+
+    def asyncapi_yaml(self, request: Request) -> Response:
+        return self._asyncapi_document("yaml").respond(request)
+
+    def _asyncapi_document(self, format: str) -> RenderedDocument:
+        """
+        The spec is rendered to bytes once per format and reused
+        until a handler or emitter gets registered.
+        """
+        document = self._asyncapi_documents.get(format)
+        if document is not None:
+            return document
+
+        content = self.asyncapi().model_dump_json(by_alias=True, exclude_none=True)
+        if format == "yaml":
+            try:
+                import yaml
+            except ImportError:
+                raise HTTPException(404, "Serving YAML spec requires PyYAML")
+
+            document = RenderedDocument(
+                yaml.safe_dump(json.loads(content), sort_keys=False).encode(),
+                media_type="application/yaml",
+            )
+        else:
+            document = RenderedDocument(content.encode(), media_type="application/json")
+
+        self._asyncapi_documents[format] = document
+        return document
+
+    def _invalidate_asyncapi(self):
+        self.asyncapi_schema = None
+        self._asyncapi_documents = {}
+
+    async def metrics(self) -> str:
+        # Run on the event loop, which changes the manager's rooms
+        if self._metrics is None:
+            return ""
+        return self._metrics.render(
+            {
+                namespace: len(self._sio.manager.rooms[namespace].get(None, {}))
+                for namespace in self._sio.manager.get_namespaces()
+            }
+        )
+
+    def add_middleware(self, middleware: SIOMiddleware):
+        """
+        Adds the middleware of all event handlers registered afterwards.
+        """
+        # Middleware is compiled into the handlers when they get registered
+        if self._handlers:
+            raise RuntimeError("Cannot add middleware after handlers are registered")
+        self._middleware.append(middleware)
+
+    def _get_connection_dependencies(
+        self, graph: DependencyGraph, namespace: str
+    ) -> ConnectionDependencies:
+        """
+        Connections are tracked once a handler with dependencies gets registered,
+        their auth data once a dependency requires it.
+        """
+        connections = self._connection_dependencies
+        if connections is None:
+            connections = self._connection_dependencies = ConnectionDependencies()
+            self._sio.connect_guards.append(connections.connect)
+            self._sio.disconnect_listeners.append(connections.disconnected)
+        connections.add(graph, namespace)
+        return connections
+
+    def namespace(self, namespace: str) -> SIONamespace:
+        """
+        Returns the registry of handlers and emitters of the namespace.
+        """
+        if not namespace.startswith("/"):
+            raise ValueError("Namespace must start with a slash")
+
+        registry = self._namespaces.get(namespace)
+        if registry is None:
+            registry = self._namespaces[namespace] = SIONamespace(self, namespace)
+            # Clients may connect to namespaces having emitters only
+            if self._sio.namespaces != "*" and namespace not in self._sio.namespaces:
+                self._sio.namespaces.append(namespace)
+        return registry
+
     def on(
         self,
         event: str,
@@ -100,22 +268,86 @@ class FastAPISIO:
         description: str | None = None,
         message_description: str | None = None,
         model: Type[BaseModel] | None = None,
-        media_type: str = "application/json",
+        media_type: str | None = None,
+        validate: bool = False,
+        namespace: str = "/",
+        max_concurrency: int | None = None,
+        ordered_per_sid: bool = False,
+        run_in: RunIn | None = None,
+        rate_limit: str | List[str] | None = None,
     ) -> Callable:
+        """
+        Registers the event handler.
+
+        :param validate: Validate payloads into the `model` before calling the handler.
+        :param max_concurrency: Maximum number of concurrently running invocations.
+        :param ordered_per_sid: Handle messages of a connection one after another.
+        :param run_in: Run the sync handler in a `threadpool` or `processpool`.
+        :param rate_limit: Limits such as `100/s per sid` applied to every client
+                           or `1000/min` shared by all of them.
+
+        Handler parameters declared with `Depends` receive values of the
+        dependencies, see `fastapi_sio.Depends`.
+        """
+        if validate and model is None:
+            raise ValueError("Handler validation requires a model")
+
+        rate_limits = [rate_limit] if isinstance(rate_limit, str) else rate_limit
+        rate_limiter = RateLimiter(rate_limits) if rate_limits else None
+
         def decorator(fn: Callable):
-            self._handlers.append(
-                SIOHandler(
-                    name=fn.__name__,
-                    event=event,
-                    title=title,
-                    summary=summary,
-                    description=description,
-                    model=model,
-                    media_type=media_type,
-                    message_description=message_description,
+            dependencies = DependencyGraph(fn)
+            handler_meta = SIOHandler(
+                name=fn.__name__,
+                event=event,
+                namespace=namespace,
+                title=title,
+                summary=summary,
+                description=description,
+                model=model,
+                media_type=media_type or self._media_type,
+                message_description=message_description,
+                rate_limit=rate_limits,
+            )
+            self._handlers.append(handler_meta)
+            if self._asyncapi_builder is not None:
+                self._asyncapi_builder.add_handler(handler_meta)
+            self._invalidate_asyncapi()
+            handler = offloaded_handler(fn, run_in) if run_in is not None else fn
+            if dependencies:
+                handler = injecting_handler(
+                    handler,
+                    dependencies,
+                    self._get_connection_dependencies(dependencies, namespace),
+                    self._sio.get_environ,
+                    event,
+                    namespace=namespace,
                 )
+            handler = compile_dispatch(
+                handler,
+                self._middleware,
+                event,
+                namespace=namespace,
+                model=model if validate else None,
+                metrics=(
+                    self._metrics.handler_metrics(event, namespace=namespace)
+                    if self._metrics is not None
+                    else None
+                ),
             )
-            self._sio.on(event=event, handler=fn)
+            if max_concurrency is not None or ordered_per_sid:
+                limiter = HandlerLimiter(max_concurrency, ordered_per_sid)
+                handler = limiter.wrap(handler)
+                if self._metrics is not None:
+                    self._metrics.register_limiter(event, limiter, namespace=namespace)
+            self._sio.on(event=event, handler=handler, namespace=namespace)
+            if rate_limiter is not None:
+                self._sio.rate_limiters[(namespace, event)] = rate_limiter
+                if self._metrics is not None:
+                    self._metrics.register_rate_limiter(
+                        event, rate_limiter, namespace=namespace
+                    )
+            return fn
 
         return decorator
 
@@ -127,36 +359,84 @@ class FastAPISIO:
         summary: str | None = None,
         description: str | None = None,
         message_description: str | None = None,
-        media_type: str = "application/json",
+        media_type: str | None = None,
         include: Optional[Any] = None,
         exclude: Optional[Any] = None,
         by_alias: bool = True,
         exclude_unset: bool = False,
         exclude_defaults: bool = False,
         exclude_none: bool = False,
+        pre_encode: bool = False,
+        batch: BatchPolicy | None = None,
+        conflate: Callable[[T], Hashable] | None = None,
+        delta: DeltaPolicy | None = None,
+        replay: ReplayPolicy | None = None,
+        namespace: str = "/",
     ) -> SIOJsonEmitter[T]:
-        emitter = SIOJsonEmitter(
+        meta = SIOEmitterMeta(
+            event=event,
+            namespace=namespace,
+            title=title,
+            summary=summary,
+            description=description,
             model=model,
-            meta=SIOEmitterMeta(
-                event=event,
-                title=title,
-                summary=summary,
-                description=description,
-                model=model,
-                media_type=media_type,
-                message_description=message_description,
-                include=include,
-                exclude=exclude,
-                by_alias=by_alias,
-                exclude_unset=exclude_unset,
-                exclude_defaults=exclude_defaults,
-                exclude_none=exclude_none,
-            ),
+            media_type=media_type or self._media_type,
+            message_description=message_description,
+            include=include,
+            exclude=exclude,
+            by_alias=by_alias,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+            batch=batch,
+            delta=delta,
+            replay=replay,
+        )
+
+        emitter = make_emitter(
+            model=model,
+            meta=meta,
             sio=self._sio,
+            pre_encode=pre_encode,
+            conflate=conflate,
         )
+        if self._metrics is not None:
+            emitter.metrics = self._metrics.register_emitter(
+                event, emitter, namespace=namespace
+            )
+        if isinstance(emitter, SIODeltaEmitter):
+            self._sio.join_listeners.append(emitter.joined)
+            self._sio.on(
+                event + RESYNC_EVENT_SUFFIX,
+                handler=emitter.resync_requested,
+                namespace=namespace,
+            )
+        if replay is not None:
+            self._sio.connect_listeners.append(emitter.resume)
         self._emitters.append(emitter)
+        if self._asyncapi_builder is not None:
+            self._asyncapi_builder.add_emitter(meta)
+        self._invalidate_asyncapi()
         return emitter
 
+    def create_session_store(
+        self,
+        model: Type[T],
+        backend: "SessionBackend | None" = None,
+        max_size: int = 10000,
+        ttl: float | None = None,
+    ) -> "SessionStore[T]":
+        """
+        Creates a store of typed sessions keyed by the client sid,
+        see `SessionStore`. Sessions are deleted from its cache
+        and backend once their client disconnects.
+        """
+        from fastapi_sio.sessions import SessionStore
+
+        store = SessionStore(model, backend=backend, max_size=max_size, ttl=ttl)
+        self._sio.disconnect_listeners.append(store.disconnected)
+        return store
+
     @property
     def connect(self):
         def decorator(fn: Callable):
@@ -168,6 +448,10 @@ class FastAPISIO:
     def attach(self):
         return self._sio.attach
 
+    @property
+    def call(self):
+        return self._sio.call
+
     @property
     def close_room(self):
         return self._sio.close_room
@@ -1,8 +1,14 @@
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Set, Type
 from pydantic import BaseModel
 from pydantic.json_schema import models_json_schema
 
-from fastapi_sio.actors import SIOEmitterMeta, SIOHandler
+from fastapi_sio.actors import (
+    PATCH_EVENT_SUFFIX,
+    REPLAY_GAP_EVENT_SUFFIX,
+    SIOActorMeta,
+    SIOEmitterMeta,
+    SIOHandler,
+)
 from fastapi_sio.schemas.asyncapi import (
     AsyncAPI,
     AsyncAPIChannel,
@@ -13,12 +19,41 @@ from fastapi_sio.schemas.asyncapi import (
     AsyncAPIOperation,
     AsyncAPIServer,
     OpenAPIReference,
+    OpenAPISchema,
 )
 
-
 REF_SCHEMA_TEMPLATE = "#/components/schemas/{model}"
 REF_CHANNEL_TEMPLATE = "#/channels/{channel}"
 
+PATCH_DESCRIPTIONS = {
+    "merge-patch": "JSON Merge Patch (RFC 7396) of the last received snapshot",
+    "json-patch": "JSON Patch (RFC 6902) of the last received snapshot",
+}
+PATCH_VERSION_DESCRIPTION = (
+    ", followed by the version it produces and the version it applies to."
+    " Clients holding another version should request a snapshot with"
+    " the `{event}:resync` event"
+)
+REPLAY_GAP_DESCRIPTION = (
+    "Some of the messages following the sequence number presented by the client"
+    " are no longer kept, carries the sequence number of the last message"
+)
+PATCH_SCHEMAS = {
+    "merge-patch": OpenAPISchema(type="object"),
+    "json-patch": OpenAPISchema(
+        type="array",
+        items=OpenAPISchema(
+            type="object",
+            required=["op", "path"],
+            properties={
+                "op": OpenAPISchema(type="string", enum=["add", "remove", "replace"]),
+                "path": OpenAPISchema(type="string"),
+                "value": OpenAPISchema(),
+            },
+        ),
+    ),
+}
+
 
 def get_asyncapi(
     id: str,
@@ -30,9 +65,12 @@ def get_asyncapi(
     emitters: List[SIOEmitterMeta],
     defaultContentType: str = "application/json",
 ) -> AsyncAPI:
-    used_models = [
-        handler.model for handler in handlers if handler.model is not None
-    ] + [emitter.model for emitter in emitters if emitter.model is not None]
+    used_models = list(
+        dict.fromkeys(
+            [handler.model for handler in handlers if handler.model is not None]
+            + [emitter.model for emitter in emitters if emitter.model is not None]
+        )
+    )
 
     return AsyncAPI(
         id=AsyncAPIIdentifier(id),
@@ -49,23 +87,44 @@ def get_asyncapi(
     )
 
 
+def get_channel_id(actor: SIOActorMeta) -> str:
+    """
+    Events of the default namespace are identified by their name,
+    events of other namespaces are prefixed, e.g. `telemetry.position`.
+    """
+    if actor.namespace == "/":
+        return actor.event
+    return actor.namespace.strip("/").replace("/", ".") + "." + actor.event
+
+
+def get_channel_address(actor: SIOActorMeta) -> str | None:
+    return actor.namespace if actor.namespace != "/" else None
+
+
 def get_operations(handlers: List[SIOHandler], emitters: List[SIOEmitterMeta]):
     return {
-        handler.event: AsyncAPIOperation(
-            action="send",
-            channel=OpenAPIReference(
-                **{"$ref": REF_CHANNEL_TEMPLATE.format(channel=handler.event)}
-            ),
-            title=handler.name,
-            summary=handler.summary,
-            description=handler.description,
+        get_channel_id(handler): AsyncAPIOperation.model_validate(
+            {
+                "action": "send",
+                "channel": OpenAPIReference(
+                    **{
+                        "$ref": REF_CHANNEL_TEMPLATE.format(
+                            channel=get_channel_id(handler)
+                        )
+                    }
+                ),
+                "title": handler.name,
+                "summary": handler.summary,
+                "description": handler.description,
+                "x-rate-limit": handler.rate_limit,
+            }
         )
         for handler in handlers
     } | {
-        emitter.event: AsyncAPIOperation(
+        get_channel_id(emitter): AsyncAPIOperation(
             action="receive",
             channel=OpenAPIReference(
-                **{"$ref": REF_CHANNEL_TEMPLATE.format(channel=emitter.event)}
+                **{"$ref": REF_CHANNEL_TEMPLATE.format(channel=get_channel_id(emitter))}
             ),
             summary=emitter.summary,
             description=emitter.description,
@@ -78,48 +137,80 @@ def get_channels(
     handlers: List[SIOHandler], emitters: List[SIOEmitterMeta]
 ) -> dict[str, AsyncAPIChannel]:
     return {
-        handler.event: AsyncAPIChannel(
+        get_channel_id(handler): AsyncAPIChannel(
+            address=get_channel_address(handler),
             messages={
                 handler.event: AsyncAPIMessage(
                     name=handler.name,
                     contentType=handler.media_type,
                     description=handler.message_description,
-                    payload=OpenAPIReference(
-                        **{
-                            "$ref": REF_SCHEMA_TEMPLATE.format(
-                                model=handler.model.__name__
-                            )
-                        }
-                    )
-                    if handler.model is not None
-                    else None,
+                    payload=(
+                        OpenAPIReference(
+                            **{
+                                "$ref": REF_SCHEMA_TEMPLATE.format(
+                                    model=handler.model.__name__
+                                )
+                            }
+                        )
+                        if handler.model is not None
+                        else None
+                    ),
                 )
             },
         )
         for handler in handlers
     } | {
-        emitter.event: AsyncAPIChannel(
-            messages={
-                emitter.event: AsyncAPIMessage(
-                    name=emitter.event,
-                    contentType=emitter.media_type,
-                    description=emitter.message_description,
-                    payload=OpenAPIReference(
-                        **{
-                            "$ref": REF_SCHEMA_TEMPLATE.format(
-                                model=emitter.model.__name__
-                            )
-                        }
-                    )
-                    if emitter.model is not None
-                    else None,
-                )
-            },
+        get_channel_id(emitter): AsyncAPIChannel(
+            address=get_channel_address(emitter),
+            messages=get_emitter_messages(emitter),
         )
         for emitter in emitters
     }
 
 
+def get_emitter_messages(emitter: SIOEmitterMeta) -> Dict[str, AsyncAPIMessage]:
+    messages = {
+        emitter.event: AsyncAPIMessage(
+            name=emitter.event,
+            contentType=emitter.media_type,
+            description=emitter.message_description,
+            payload=get_emitter_payload(emitter),
+        )
+    }
+    # Delta emitters send the snapshots above and patches of them
+    if emitter.delta is not None:
+        messages[emitter.event + "_patch"] = AsyncAPIMessage(
+            name=emitter.event + PATCH_EVENT_SUFFIX,
+            contentType=emitter.media_type,
+            description=PATCH_DESCRIPTIONS[emitter.delta.format]
+            + PATCH_VERSION_DESCRIPTION.format(event=emitter.event),
+            payload=PATCH_SCHEMAS[emitter.delta.format],
+        )
+    if emitter.replay is not None:
+        messages[emitter.event + "_gap"] = AsyncAPIMessage(
+            name=emitter.event + REPLAY_GAP_EVENT_SUFFIX,
+            contentType=emitter.media_type,
+            description=REPLAY_GAP_DESCRIPTION,
+            payload=OpenAPISchema(type="integer"),
+        )
+    return messages
+
+
+def get_emitter_payload(
+    emitter: SIOEmitterMeta,
+) -> OpenAPIReference | OpenAPISchema | None:
+    if emitter.model is None:
+        return None
+
+    ref = {"$ref": REF_SCHEMA_TEMPLATE.format(model=emitter.model.__name__)}
+
+    # Batching emitters send an array of the payloads
+    if emitter.batch is not None:
+        return OpenAPISchema(type="array", items=OpenAPISchema.model_validate(ref))
+
+    return OpenAPIReference(**ref)
+
+
 def get_components(used_models: List[Type[BaseModel]]) -> AsyncAPIComponents:
     _, schemas = models_json_schema(
         [(model, "validation") for model in used_models],
@@ -129,3 +220,77 @@ def get_components(used_models: List[Type[BaseModel]]) -> AsyncAPIComponents:
     return AsyncAPIComponents(
         schemas=schemas["$defs"],
     )
+
+
+def get_model_schemas(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    JSON schema of the model and all the models it references.
+    """
+    schema = model.model_json_schema(ref_template=REF_SCHEMA_TEMPLATE)
+    schemas = schema.pop("$defs", {})
+    schemas[model.__name__] = schema
+
+    return dict(AsyncAPIComponents(schemas=schemas).schemas or {})
+
+
+class AsyncAPIBuilder:
+    """
+    Builds the AsyncAPI document incrementally. Registered handlers and
+    emitters are only queued, their channels, operations and model schemas
+    are generated on the next `build` and kept, so a rebuild after new
+    registrations costs only the newly added parts. Schema of every model
+    is generated once, no matter how many actors use it.
+    """
+
+    def __init__(self):
+        self._pending_handlers: List[SIOHandler] = []
+        self._pending_emitters: List[SIOEmitterMeta] = []
+        self._models: Set[Type[BaseModel]] = set()
+        self.channels: Dict[str, AsyncAPIChannel] = {}
+        self.operations: Dict[str, AsyncAPIOperation] = {}
+        self.schemas: Dict[str, Any] = {}
+
+    def add_handler(self, handler: SIOHandler):
+        self._pending_handlers.append(handler)
+
+    def add_emitter(self, emitter: SIOEmitterMeta):
+        self._pending_emitters.append(emitter)
+
+    def build(
+        self,
+        id: str,
+        title: str,
+        version: str,
+        description: str,
+        servers: Dict[str, AsyncAPIServer],
+        defaultContentType: str = "application/json",
+    ) -> AsyncAPI:
+        self._process_pending()
+
+        return AsyncAPI(
+            id=AsyncAPIIdentifier(id),
+            info=AsyncAPIInfo(
+                title=title,
+                version=version,
+                description=description,
+            ),
+            servers=servers,
+            defaultContentType=defaultContentType,
+            channels=self.channels,
+            operations=self.operations,
+            components=AsyncAPIComponents(schemas=self.schemas),
+        )
+
+    def _process_pending(self):
+        handlers, self._pending_handlers = self._pending_handlers, []
+        emitters, self._pending_emitters = self._pending_emitters, []
+        if not handlers and not emitters:
+            return
+
+        self.channels |= get_channels(handlers, emitters)
+        self.operations |= get_operations(handlers, emitters)
+
+        for actor in [*handlers, *emitters]:
+            if actor.model is not None and actor.model not in self._models:
+                self._models.add(actor.model)
+                self.schemas |= get_model_schemas(actor.model)
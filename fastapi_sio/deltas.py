@@ -0,0 +1,69 @@
+"""
+Differences between two JSON documents (model dumps), expressed either
+as a JSON Merge Patch (RFC 7396) or as a JSON Patch (RFC 6902).
+"""
+
+from typing import Any, Dict, List
+
+
+def merge_patch(old: Any, new: Any) -> Dict[str, Any] | None:
+    """
+    Returns the merge patch turning `old` into `new`, `None` if they are equal.
+    Removed keys are set to `null`, so are keys changed to `null`,
+    which merge patches cannot tell apart. Arrays are replaced as a whole.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        raise ValueError("Merge patch requires both documents to be objects")
+
+    patch: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+
+        old_value = old[key]
+        if old_value == value:
+            continue
+        if isinstance(old_value, dict) and isinstance(value, dict):
+            nested = merge_patch(old_value, value)
+            if nested is not None:
+                patch[key] = nested
+        else:
+            patch[key] = value
+
+    for key in old:
+        if key not in new:
+            patch[key] = None
+
+    return patch or None
+
+
+def escape_pointer(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Returns the operations turning `old` into `new`, an empty list if they
+    are equal. Objects are compared key by key, other values (arrays
+    included) are replaced as a whole.
+    """
+    if old == new:
+        return []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    operations: List[Dict[str, Any]] = []
+    for key, value in new.items():
+        pointer = path + "/" + escape_pointer(key)
+        if key not in old:
+            operations.append({"op": "add", "path": pointer, "value": value})
+        else:
+            operations.extend(json_patch(old[key], value, pointer))
+
+    for key in old:
+        if key not in new:
+            pointer = path + "/" + escape_pointer(key)
+            operations.append({"op": "remove", "path": pointer})
+
+    return operations
@@ -0,0 +1,351 @@
+"""
+Dependency injection of event handlers, in the style of FastAPI.
+The dependency graph of a handler is resolved into an ordered list
+of calls once, when the handler is registered.
+"""
+
+import inspect
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Tuple,
+    get_args,
+    get_origin,
+)
+
+from fastapi import HTTPException, params
+from socketio.exceptions import ConnectionRefusedError
+
+DependencyScope = Literal["message", "connection"]
+
+# Parameters of handlers and dependencies provided by the message itself
+MESSAGE_PARAMETERS = frozenset(("sid", "data", "namespace", "event"))
+# Parameters provided by the connection, available to any dependency
+CONNECTION_PARAMETERS = frozenset(("environ", "auth"))
+
+
+class Dependency:
+    """
+    Parameter of a handler or a dependency, resolved by calling `dependency`.
+    Created through `Depends`.
+    """
+
+    __slots__ = ("dependency", "use_cache", "scope")
+
+    def __init__(
+        self,
+        dependency: Callable[..., Any],
+        use_cache: bool = True,
+        scope: DependencyScope = "message",
+    ):
+        self.dependency = dependency
+        self.use_cache = use_cache
+        self.scope: DependencyScope = scope
+
+
+def Depends(
+    dependency: Callable[..., Any],
+    *,
+    use_cache: bool = True,
+    scope: DependencyScope = "message",
+) -> Any:
+    """
+    Declares a dependency of an event handler:
+
+        async def current_user(environ) -> User: ...
+
+        @sio_app.on("order")
+        async def handle_order(
+            sid, data, user: User = Depends(current_user, scope="connection")
+        ): ...
+
+    Dependencies may be sync or async functions or generators, called in the
+    event loop like the handlers. They receive their own dependencies and any
+    of the `sid`, `data`, `namespace`, `event`, `environ` and `auth` parameters
+    by name. Dependencies are called once per message, even when several
+    parameters depend on them, unless `use_cache` is false. Dependencies with
+    the `connection` scope are called when the client connects, before the
+    connect handler, and their values are reused until it disconnects.
+    When one of them raises, the connection is refused, with the detail
+    of an `HTTPException` or the data of a socketio `ConnectionRefusedError`.
+    Generators run until the handler returns, connection scoped ones cannot
+    be generators.
+    """
+    return Dependency(dependency, use_cache=use_cache, scope=scope)
+
+
+def get_dependency(parameter: inspect.Parameter) -> Dependency | None:
+    """
+    Dependency declared by the parameter default or its `Annotated` metadata.
+    FastAPI's `Depends` is accepted as well, with the message scope.
+    """
+    candidates = [parameter.default]
+    if get_origin(parameter.annotation) is Annotated:
+        candidates += get_args(parameter.annotation)[1:]
+
+    for candidate in candidates:
+        if isinstance(candidate, Dependency):
+            return candidate
+        if isinstance(candidate, params.Depends) and candidate.dependency:
+            return Dependency(candidate.dependency, use_cache=candidate.use_cache)
+    return None
+
+
+class DependencyCall:
+    """
+    Call of a dependency, with its arguments given by the names
+    of parameters or results of the previous calls.
+    """
+
+    __slots__ = ("key", "call", "kind", "scope", "arguments")
+
+    def __init__(
+        self,
+        key: Any,
+        call: Callable,
+        scope: DependencyScope,
+        arguments: List[Tuple[str, Any]],
+    ):
+        self.key = key
+        self.call = call
+        self.scope = scope
+        self.arguments = arguments
+        if inspect.isasyncgenfunction(call):
+            self.kind = "async_generator"
+        elif inspect.isgeneratorfunction(call):
+            self.kind = "generator"
+        elif inspect.iscoroutinefunction(call):
+            self.kind = "async"
+        else:
+            self.kind = "sync"
+
+
+class DependencyGraph:
+    """
+    Dependencies of a handler in the order they have to be called,
+    with the handler parameters they are passed to.
+    """
+
+    def __init__(self, fn: Callable):
+        self.calls: List[DependencyCall] = []
+        self.parameters: List[Tuple[str, Any]] = []
+        self.uses_auth = False
+        self._resolving: List[Callable] = []
+
+        for name, parameter in inspect.signature(fn).parameters.items():
+            dependency = get_dependency(parameter)
+            if dependency is not None:
+                self.parameters.append((name, self._add(dependency)))
+
+        self.has_generators = any(
+            call.kind in ("generator", "async_generator") for call in self.calls
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.parameters)
+
+    def _add(self, dependency: Dependency) -> Any:
+        """
+        Adds the dependency after its own dependencies,
+        returns the key its value is resolved under.
+        """
+        call = dependency.dependency
+        key = call if dependency.use_cache else object()
+        for existing in self.calls:
+            if existing.key is key:
+                if existing.scope != dependency.scope:
+                    raise ValueError(
+                        f"Dependency {call.__name__} is used with different scopes"
+                    )
+                return key
+
+        if call in self._resolving:
+            raise ValueError(f"Dependency {call.__name__} depends on itself")
+        self._resolving.append(call)
+
+        arguments: List[Tuple[str, Any]] = []
+        for name, parameter in inspect.signature(call).parameters.items():
+            sub_dependency = get_dependency(parameter)
+            if sub_dependency is not None:
+                if dependency.scope == "connection" and (
+                    sub_dependency.scope != "connection"
+                ):
+                    raise ValueError(
+                        f"Connection scoped dependency {call.__name__} cannot "
+                        f"depend on message scoped {name!r}"
+                    )
+                arguments.append((name, self._add(sub_dependency)))
+            elif name in CONNECTION_PARAMETERS:
+                self.uses_auth = self.uses_auth or name == "auth"
+                arguments.append((name, name))
+            elif name in MESSAGE_PARAMETERS:
+                if dependency.scope == "connection" and name != "sid":
+                    raise ValueError(
+                        f"Connection scoped dependency {call.__name__} cannot "
+                        f"depend on message parameter {name!r}"
+                    )
+                arguments.append((name, name))
+            elif parameter.default is inspect.Parameter.empty:
+                raise ValueError(
+                    f"Cannot resolve parameter {name!r} of dependency {call.__name__}"
+                )
+
+        self._resolving.pop()
+        dependency_call = DependencyCall(key, call, dependency.scope, arguments)
+        if dependency_call.scope == "connection" and dependency_call.kind in (
+            "generator",
+            "async_generator",
+        ):
+            raise ValueError(
+                f"Connection scoped dependency {call.__name__} cannot be a generator"
+            )
+        self.calls.append(dependency_call)
+        return key
+
+
+class ConnectionDependencies:
+    """
+    Values of connection scoped dependencies and auth data of connected
+    clients, by their namespace and sid. Dropped once the client disconnects.
+    """
+
+    def __init__(self):
+        self.values: Dict[Tuple[str, str], Dict[Any, Any]] = {}
+        self.auths: Dict[Tuple[str, str], Any] = {}
+        self.track_auth = False
+        # Connection scoped calls of all handlers, by their namespace
+        self.calls: Dict[str, List[DependencyCall]] = {}
+
+    def add(self, graph: DependencyGraph, namespace: str):
+        """
+        Resolves connection scoped dependencies of the graph once clients
+        connect to the namespace.
+        """
+        self.track_auth = self.track_auth or graph.uses_auth
+        calls = self.calls.setdefault(namespace, [])
+        keys = {call.key for call in calls}
+        # Graph calls follow their own dependencies already
+        calls += [
+            call
+            for call in graph.calls
+            if call.scope == "connection" and call.key not in keys
+        ]
+
+    async def connect(
+        self, sid: str, namespace: str, environ: Dict[str, Any], auth: Any
+    ):
+        """
+        Connect guard, resolving connection scoped dependencies.
+        """
+        if self.track_auth:
+            self.auths[(namespace, sid)] = auth
+        calls = self.calls.get(namespace)
+        if not calls:
+            return
+
+        values: Dict[Any, Any] = {"sid": sid, "environ": environ, "auth": auth}
+        connection_values = self.values[(namespace, sid)] = {}
+        for call in calls:
+            kwargs = {name: values[key] for name, key in call.arguments}
+            try:
+                value = call.call(**kwargs)
+                if call.kind == "async":
+                    value = await value
+            except HTTPException as exc:
+                raise ConnectionRefusedError(exc.detail)
+            values[call.key] = connection_values[call.key] = value
+
+    async def disconnected(self, sid: str, namespace: str):
+        self.values.pop((namespace, sid), None)
+        self.auths.pop((namespace, sid), None)
+
+
+def injecting_handler(
+    fn: Callable,
+    graph: DependencyGraph,
+    connections: ConnectionDependencies,
+    get_environ: Callable[[str, str], Any],
+    event: str,
+    namespace: str = "/",
+) -> Callable:
+    """
+    Wraps the handler, so it receives values of its dependencies
+    as keyword arguments.
+    """
+    calls = graph.calls
+    parameters = graph.parameters
+    is_async = inspect.iscoroutinefunction(fn)
+
+    async def resolve(sid: str, data: Any, stack: AsyncExitStack | None) -> Dict:
+        values: Dict[Any, Any] = {
+            "sid": sid,
+            "data": data,
+            "namespace": namespace,
+            "event": event,
+        }
+        connection_values = None
+
+        for call in calls:
+            if call.scope == "connection":
+                if connection_values is None:
+                    connection_values = connections.values.setdefault(
+                        (namespace, sid), {}
+                    )
+                if call.key in connection_values:
+                    values[call.key] = connection_values[call.key]
+                    continue
+
+            kwargs = {}
+            for name, key in call.arguments:
+                if key not in values:
+                    # Connection parameters are looked up on demand only
+                    if key == "environ":
+                        values[key] = get_environ(sid, namespace)
+                    elif key == "auth":
+                        values[key] = connections.auths.get((namespace, sid))
+                kwargs[name] = values[key]
+
+            if call.kind == "async":
+                value = await call.call(**kwargs)
+            elif call.kind == "sync":
+                value = call.call(**kwargs)
+            elif call.kind == "async_generator":
+                assert stack is not None
+                value = await stack.enter_async_context(
+                    asynccontextmanager(call.call)(**kwargs)
+                )
+            else:
+                assert stack is not None
+                value = stack.enter_context(contextmanager(call.call)(**kwargs))
+
+            values[call.key] = value
+            if call.scope == "connection":
+                assert connection_values is not None
+                connection_values[call.key] = value
+
+        return {name: values[key] for name, key in parameters}
+
+    if graph.has_generators:
+
+        async def handler_with_exit_stack(sid, *args):
+            # Generators are closed once the handler returns
+            async with AsyncExitStack() as stack:
+                kwargs = await resolve(sid, args[0] if args else None, stack)
+                if is_async:
+                    return await fn(sid, *args, **kwargs)
+                return fn(sid, *args, **kwargs)
+
+        return handler_with_exit_stack
+
+    async def handler(sid, *args):
+        kwargs = await resolve(sid, args[0] if args else None, None)
+        if is_async:
+            return await fn(sid, *args, **kwargs)
+        return fn(sid, *args, **kwargs)
+
+    return handler
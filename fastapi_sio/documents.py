@@ -0,0 +1,75 @@
+"""
+Serving of pre-rendered documents (the AsyncAPI spec) with strong ETags,
+conditional requests and pre-compressed variants.
+"""
+
+import gzip
+from hashlib import sha256
+from typing import Dict, Mapping, Tuple
+
+from fastapi import Request, Response
+
+# Content encodings in the order of preference
+ENCODINGS = ("br", "gzip")
+
+
+class RenderedDocument:
+    """
+    Document rendered to bytes once, including all its compressed
+    variants. Brotli variant is available with the `brotli` package.
+    """
+
+    def __init__(self, content: bytes, media_type: str):
+        self.media_type = media_type
+        self.etag = f'"{sha256(content).hexdigest()[:32]}"'
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (content, self.etag)}
+
+        self.variants["gzip"] = (
+            gzip.compress(content, compresslevel=9, mtime=0),
+            self.etag[:-1] + '-gzip"',
+        )
+        try:
+            import brotli
+
+            self.variants["br"] = (brotli.compress(content), self.etag[:-1] + '-br"')
+        except ImportError:
+            pass
+
+        self._etags = {etag for _, etag in self.variants.values()}
+
+    def respond(self, request: Request) -> Response:
+        encoding = negotiate_encoding(
+            request.headers.get("accept-encoding", ""), self.variants
+        )
+        content, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=content, media_type=self.media_type, headers=headers)
+
+    def matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            tag.strip().removeprefix("W/") in self._etags
+            for tag in if_none_match.split(",")
+        )
+
+
+def negotiate_encoding(accept_encoding: str, available: Mapping[str, object]) -> str:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+
+    for encoding in ENCODINGS:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
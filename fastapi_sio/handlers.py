@@ -0,0 +1,151 @@
+import asyncio
+import inspect
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, nullcontext
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Type
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+RunIn = Literal["threadpool", "processpool"]
+
+
+def validation_error_ack(error: ValidationError) -> dict[str, Any]:
+    """
+    Structured acknowledgement returned to the client
+    when its payload fails the validation.
+    """
+    return {
+        "error": "validation_error",
+        "detail": error.errors(
+            include_url=False, include_context=False, include_input=False
+        ),
+    }
+
+
+def validating_handler(fn: Callable, model: Type[BaseModel]) -> Callable:
+    """
+    Wraps the handler, so it receives the validated model instance
+    instead of the raw payload. The type adapter is built once here,
+    invalid payloads are acknowledged with an error and the handler
+    is never called.
+    """
+    adapter = TypeAdapter(model)
+
+    if inspect.iscoroutinefunction(fn):
+
+        async def async_handler(sid, data=None, *args):
+            try:
+                payload = adapter.validate_python(data)
+            except ValidationError as error:
+                return validation_error_ack(error)
+            return await fn(sid, payload, *args)
+
+        return async_handler
+
+    def handler(sid, data=None, *args):
+        try:
+            payload = adapter.validate_python(data)
+        except ValidationError as error:
+            return validation_error_ack(error)
+        return fn(sid, payload, *args)
+
+    return handler
+
+
+@lru_cache(maxsize=None)
+def get_process_pool() -> Executor:
+    # Imports multiprocessing, which is not needed unless used
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor()
+
+
+def offloaded_handler(fn: Callable, run_in: RunIn) -> Callable:
+    """
+    Wraps the sync handler, so it runs in the thread pool shared with
+    FastAPI or in a process pool, without blocking the event loop.
+    Handlers running in the process pool, their arguments and
+    return values have to be picklable.
+    """
+    if inspect.iscoroutinefunction(fn):
+        raise ValueError("Only sync handlers can run in a thread or process pool")
+
+    if run_in == "threadpool":
+
+        async def threadpool_handler(*args, **kwargs):
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+        return threadpool_handler
+
+    async def processpool_handler(*args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            get_process_pool(), partial(fn, *args, **kwargs)
+        )
+
+    return processpool_handler
+
+
+class HandlerLimiter:
+    """
+    Limits concurrent executions of a handler to `max_concurrency`,
+    with `ordered_per_sid` messages of every connection are handled one
+    after another, in the order they arrived. Invocations waiting for
+    their turn are counted in `waiting`, the executing ones in `running`.
+    """
+
+    __slots__ = ("semaphore", "ordered_per_sid", "locks", "waiting", "running")
+
+    def __init__(self, max_concurrency: int | None, ordered_per_sid: bool):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency has to be at least 1")
+
+        self.semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency is not None else None
+        )
+        self.ordered_per_sid = ordered_per_sid
+        # Lock of every connection with pending messages and number of its users
+        self.locks: Dict[str, List[Any]] = {}
+        self.waiting = 0
+        self.running = 0
+
+    def wrap(self, fn: Callable) -> Callable:
+        is_async = inspect.iscoroutinefunction(fn)
+
+        async def limited_handler(sid, *args):
+            self.waiting += 1
+            started = False
+            try:
+                async with self._sid_lock(sid), self.semaphore or nullcontext():
+                    self.waiting -= 1
+                    started = True
+                    self.running += 1
+                    try:
+                        if is_async:
+                            return await fn(sid, *args)
+                        return fn(sid, *args)
+                    finally:
+                        self.running -= 1
+            finally:
+                if not started:
+                    self.waiting -= 1
+
+        return limited_handler
+
+    @asynccontextmanager
+    async def _sid_lock(self, sid: str) -> AsyncIterator[None]:
+        if not self.ordered_per_sid:
+            yield
+            return
+
+        entry = self.locks.get(sid)
+        if entry is None:
+            entry = self.locks[sid] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[sid]
@@ -0,0 +1,346 @@
+import asyncio
+import json as json_module
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterator, Tuple
+
+from socketio import AsyncManager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from fastapi_sio.packets import encode_event
+
+if TYPE_CHECKING:
+    from fastapi_sio.server import SIOAsyncServer
+
+
+class ConnectionRecord:
+    """
+    Engine.IO session and rooms of a client connected to a namespace.
+    """
+
+    __slots__ = ("eio_sid", "rooms")
+
+    def __init__(self, eio_sid: str):
+        self.eio_sid = eio_sid
+        self.rooms: Tuple[Hashable, ...] = ()
+
+
+class SIOAsyncManager(AsyncManager):
+    """
+    Default client manager of `FastAPISIO`. Broadcasts are delivered to
+    the recipients one after another instead of spawning a task for
+    each of them, as queuing a packet for a client never blocks.
+    Emits with callbacks are left to `AsyncManager`.
+
+    Connections are tracked compactly: the room of every client's own
+    sid is implicit instead of a two-way dict per client, rooms of a
+    client are kept in its `ConnectionRecord`, so a disconnect touches
+    only its rooms instead of all rooms of the namespace, and room
+    names are interned. `rooms[namespace][None]` keeps all connected
+    clients, as in `AsyncManager`.
+    """
+
+    # Set by the server once it is created
+    server: "SIOAsyncServer"
+
+    def __init__(self):
+        super().__init__()
+        self.connections: Dict[str, Dict[str, ConnectionRecord]] = {}
+
+    def get_participants(self, namespace, room) -> Iterator[Tuple[str, str]]:
+        namespace_rooms = self.rooms.get(namespace)
+        if namespace_rooms is None:
+            return
+        connections = self.connections[namespace]
+        targets = (
+            room if hasattr(room, "__len__") and not isinstance(room, str) else [room]
+        )
+
+        # Participants are copied, the rooms may change while iterating
+        participants: Dict[str, str] = {}
+        for target in targets:
+            if target is None:
+                participants.update(namespace_rooms[None]._fwdm)
+            elif target in namespace_rooms:
+                participants.update(namespace_rooms[target])
+            elif target in connections:
+                participants[target] = connections[target].eio_sid
+        yield from participants.items()
+
+    def is_sid_room(self, namespace, room) -> bool:
+        return room in self.connections.get(namespace, {})
+
+    def basic_enter_room(self, sid, namespace, room, eio_sid=None):
+        if room is None:
+            super().basic_enter_room(sid, namespace, None, eio_sid=eio_sid)
+            # Looked up by `AsyncManager` when not given
+            eio_sid = self.rooms[namespace][None][sid]
+            self.connections.setdefault(namespace, {})[sid] = ConnectionRecord(eio_sid)
+            return
+        if room == sid:
+            return
+
+        if namespace not in self.rooms:
+            raise ValueError("sid is not connected to requested namespace")
+        if self.is_sid_room(namespace, room):
+            raise ValueError("cannot enter a sid room")
+        record = self.connections[namespace][sid]
+        if isinstance(room, str):
+            room = sys.intern(room)
+
+        self.rooms[namespace].setdefault(room, {})[sid] = record.eio_sid
+        if room not in record.rooms:
+            record.rooms += (room,)
+
+    def basic_leave_room(self, sid, namespace, room):
+        if room == sid:
+            return
+        if room is None:
+            self.connections.get(namespace, {}).pop(sid, None)
+            super().basic_leave_room(sid, namespace, None)
+            if namespace not in self.rooms:
+                self.connections.pop(namespace, None)
+            return
+
+        members = self.rooms.get(namespace, {}).get(room)
+        if members is None or members.pop(sid, None) is None:
+            return
+        if not members:
+            del self.rooms[namespace][room]
+
+        record = self.connections[namespace].get(sid)
+        if record is not None:
+            record.rooms = tuple(r for r in record.rooms if r != room)
+
+    def basic_disconnect(self, sid, namespace, **kwargs):
+        record = self.connections.get(namespace, {}).get(sid)
+        if record is not None:
+            for room in record.rooms:
+                self.basic_leave_room(sid, namespace, room)
+            self.basic_leave_room(sid, namespace, None)
+
+        self.callbacks.pop(sid, None)
+        pending = self.pending_disconnect.get(namespace)
+        if pending is not None and sid in pending:
+            pending.remove(sid)
+            if not pending:
+                del self.pending_disconnect[namespace]
+
+    def get_rooms(self, sid, namespace):
+        record = self.connections.get(namespace, {}).get(sid)
+        if record is None:
+            return []
+        return [sid, *record.rooms]
+
+    async def emit(
+        self,
+        event,
+        data,
+        namespace,
+        room=None,
+        skip_sid=None,
+        callback=None,
+        to=None,
+        **kwargs,
+    ):
+        if callback is not None:
+            return await super().emit(
+                event,
+                data,
+                namespace,
+                room=room,
+                skip_sid=skip_sid,
+                callback=callback,
+                to=to,
+                **kwargs,
+            )
+
+        room = to or room
+        if namespace not in self.rooms:
+            return
+        if isinstance(data, tuple):
+            data = list(data)
+        elif data is not None:
+            data = [data]
+        else:
+            data = []
+        skip_sids = set(skip_sid) if isinstance(skip_sid, list) else {skip_sid}
+
+        eio_pkts = encode_event(self.server.packet_class, namespace, event, data)
+
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid not in skip_sids:
+                for eio_pkt in eio_pkts:
+                    await self.server._send_eio_packet(eio_sid, eio_pkt)
+
+
+class AsyncUnixSocketManager(AsyncPubSubManager):
+    """
+    Client manager sharing emits, rooms and disconnects between processes
+    running on the same host, without any external message queue.
+
+    Every process binds a Unix domain datagram socket in a shared
+    directory and publishes messages by sending them to all other
+    sockets found there. Messages are limited in size by the socket
+    buffers (`max_message_size`), which the kernel caps at
+    `net.core.wmem_max` (about 208 KiB by default on Linux). Publishing
+    a larger message raises `ValueError`. Use one of the python-socketio
+    managers backed by Redis, Kafka or AMQP for larger payloads
+    or to scale across hosts.
+
+    :param path: Directory where the sockets are created, defaults to
+                 the system temporary directory.
+    :param channel: Name of the channel, processes share messages only
+                    within the same channel.
+    :param write_only: Only publish messages, used by external producers.
+    :param json: JSON module encoding the messages, `json` by default.
+    :param send_timeout: Seconds to wait for a peer with full buffers
+                         before dropping the message for it.
+    """
+
+    name = "asyncunixsocket"
+
+    # Bytes of the send buffer taken by every datagram besides the message
+    DATAGRAM_OVERHEAD = 32
+    # Seconds after which peers are listed again, even if the directory
+    # looks unchanged (its mtime may not change within the same tick)
+    PEERS_REFRESH_INTERVAL = 1.0
+    # Longest socket path Linux accepts, others allow a few bytes less
+    MAX_SOCKET_PATH = 107
+
+    def __init__(
+        self,
+        path: str | None = None,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: Any = None,
+        json: Any = None,
+        send_timeout: float = 1.0,
+        max_message_size: int = 4 * 1024 * 1024,
+    ):
+        # Managers of python-socketio before 5.17 take no JSON module
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.json = json if json is not None else json_module
+        self.directory = os.path.join(
+            path or tempfile.gettempdir(), f"fastapi-sio-{channel}"
+        )
+        self.socket_path = os.path.join(self.directory, f"{self.host_id}.sock")
+        # Binding would fail over and over in the listening task
+        if len(os.fsencode(self.socket_path)) > self.MAX_SOCKET_PATH:
+            raise ValueError(
+                f"Socket path {self.socket_path} is longer than "
+                f"{self.MAX_SOCKET_PATH} bytes, use a shorter path"
+            )
+        self.send_timeout = send_timeout
+        self.max_message_size = max_message_size
+        self._sender: socket.socket | None = None
+        self._message_size_limit = max_message_size
+        self._peers_cache: list[str] = []
+        self._peers_mtime = 0
+        self._peers_listed_at = float("-inf")
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _create_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.max_message_size)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.max_message_size)
+        sock.setblocking(False)
+        return sock
+
+    def _create_sender(self) -> socket.socket:
+        sock = self._create_socket()
+        # Requested size is silently capped by the kernel
+        send_buffer = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        self._message_size_limit = min(
+            self.max_message_size, send_buffer - self.DATAGRAM_OVERHEAD
+        )
+        if self._message_size_limit < self.max_message_size:
+            self._get_logger().warning(
+                "Messages are limited to %d bytes by the socket buffer size, "
+                "raise the net.core.wmem_max sysctl to allow %d bytes",
+                self._message_size_limit,
+                self.max_message_size,
+            )
+        return sock
+
+    def _peers(self) -> list[str]:
+        """
+        Sockets of the other processes. The directory is listed again
+        only once it changes, or after `PEERS_REFRESH_INTERVAL`.
+        """
+        mtime = os.stat(self.directory).st_mtime_ns
+        now = time.monotonic()
+        if (
+            mtime != self._peers_mtime
+            or now - self._peers_listed_at > self.PEERS_REFRESH_INTERVAL
+        ):
+            with os.scandir(self.directory) as entries:
+                self._peers_cache = [
+                    entry.path
+                    for entry in entries
+                    if entry.name.endswith(".sock") and entry.path != self.socket_path
+                ]
+            self._peers_mtime = mtime
+            self._peers_listed_at = now
+        return self._peers_cache
+
+    async def _publish(self, data):
+        if self._sender is None:
+            self._sender = self._create_sender()
+
+        message = self.json.dumps(data).encode()
+        if len(message) > self._message_size_limit:
+            raise ValueError(
+                f"Message of {len(message)} bytes exceeds the limit of "
+                f"{self._message_size_limit} bytes of AsyncUnixSocketManager"
+            )
+        for peer in self._peers():
+            await self._send_to(peer, message)
+
+    async def _send_to(self, peer: str, message: bytes):
+        assert self._sender is not None
+        deadline = asyncio.get_running_loop().time() + self.send_timeout
+
+        while True:
+            try:
+                self._sender.sendto(message, peer)
+                return
+            except BlockingIOError:
+                # Peer's receive buffer is full, give it a moment to catch up
+                if asyncio.get_running_loop().time() > deadline:
+                    self._get_logger().warning(
+                        "Dropping message for slow peer %s", peer
+                    )
+                    return
+                await asyncio.sleep(0.001)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Process owning the socket died without cleaning it up
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+                return
+            except OSError as error:
+                self._get_logger().error(
+                    "Cannot publish message to %s: %s", peer, error
+                )
+                return
+
+    async def _listen(self):
+        sock = self._create_socket()
+        sock.bind(self.socket_path)
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                yield await loop.sock_recv(sock, self.max_message_size)
+        finally:
+            sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,246 @@
+"""
+Low-overhead instrumentation of handlers and emitters,
+rendered in the Prometheus text exposition format.
+"""
+
+import inspect
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from engineio import packet as eio_packet
+
+DURATION_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class HandlerMetrics:
+    __slots__ = ("messages", "errors", "duration")
+
+    def __init__(self):
+        self.messages = 0
+        self.errors = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+
+
+class EmitterMetrics:
+    __slots__ = (
+        "messages",
+        "sent_bytes",
+        "encode_duration",
+        "payload_size",
+        "_last",
+        "_last_size",
+    )
+
+    def __init__(self):
+        self.messages = 0
+        self.sent_bytes = 0
+        self.encode_duration = Histogram(DURATION_BUCKETS)
+        self.payload_size = Histogram(SIZE_BUCKETS)
+        self._last: eio_packet.Packet | None = None
+        self._last_size = 0
+
+    def observe_packet(self, pkt: eio_packet.Packet):
+        """
+        Called for every packet queued for a recipient. Broadcasts reuse
+        the same packet for all recipients, so its size is observed once.
+        """
+        if pkt is not self._last:
+            self._last = pkt
+            self._last_size = packet_size(pkt)
+            self.payload_size.observe(self._last_size)
+        self.sent_bytes += self._last_size
+
+
+def packet_size(pkt: eio_packet.Packet) -> int:
+    """
+    Size of the packet data in bytes, text packets are sent UTF-8 encoded.
+    """
+    if pkt.data is None:
+        return 0
+    if isinstance(pkt.data, str) and not pkt.data.isascii():
+        return len(pkt.data.encode())
+    return len(pkt.data)
+
+
+def instrumented_handler(fn: Callable, metrics: HandlerMetrics) -> Callable:
+    """
+    Wraps the handler, counting and timing its calls into `metrics`.
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        async def async_handler(*args):
+            metrics.messages += 1
+            start = perf_counter()
+            try:
+                return await fn(*args)
+            except Exception:
+                metrics.errors += 1
+                raise
+            finally:
+                metrics.duration.observe(perf_counter() - start)
+
+        return async_handler
+
+    def handler(*args):
+        metrics.messages += 1
+        start = perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.duration.observe(perf_counter() - start)
+
+    return handler
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def namespace_labels(namespace: str) -> str:
+    return f'namespace="{escape_label_value(namespace)}"'
+
+
+def metric_labels(namespace: str, event: str) -> str:
+    return f'{namespace_labels(namespace)},event="{escape_label_value(event)}"'
+
+
+class SIOMetrics:
+    def __init__(self):
+        # Keyed by the rendered `namespace` and `event` labels
+        self.handlers: Dict[str, HandlerMetrics] = {}
+        self.emitters: Dict[str, Tuple[EmitterMetrics, Any]] = {}
+        self.limiters: Dict[str, Any] = {}
+        self.rate_limiters: Dict[str, Any] = {}
+
+    def handler_metrics(self, event: str, namespace: str = "/") -> HandlerMetrics:
+        return self.handlers.setdefault(
+            metric_labels(namespace, event), HandlerMetrics()
+        )
+
+    def register_limiter(self, event: str, limiter: Any, namespace: str = "/"):
+        """
+        Exposes the number of waiting and running invocations
+        of a handler with limited concurrency.
+        """
+        self.limiters[metric_labels(namespace, event)] = limiter
+
+    def register_rate_limiter(
+        self, event: str, rate_limiter: Any, namespace: str = "/"
+    ):
+        self.rate_limiters[metric_labels(namespace, event)] = rate_limiter
+
+    def register_emitter(
+        self, event: str, emitter: Any, namespace: str = "/"
+    ) -> EmitterMetrics:
+        metrics = EmitterMetrics()
+        self.emitters[metric_labels(namespace, event)] = (metrics, emitter)
+        return metrics
+
+    def render(self, connected_clients: Dict[str, int]) -> str:
+        lines: List[str] = [
+            "# TYPE sio_connected_clients gauge",
+            *(
+                f"sio_connected_clients{{{namespace_labels(namespace)}}} {count}"
+                for namespace, count in connected_clients.items()
+            ),
+            "# TYPE sio_handler_messages_total counter",
+            *(
+                f"sio_handler_messages_total{{{key}}} {metrics.messages}"
+                for key, metrics in self.handlers.items()
+            ),
+            "# TYPE sio_handler_errors_total counter",
+            *(
+                f"sio_handler_errors_total{{{key}}} {metrics.errors}"
+                for key, metrics in self.handlers.items()
+            ),
+            "# TYPE sio_handler_duration_seconds histogram",
+        ]
+        for key, metrics in self.handlers.items():
+            lines += metrics.duration.render("sio_handler_duration_seconds", key)
+
+        lines += [
+            "# TYPE sio_handler_queue_depth gauge",
+            *(
+                f"sio_handler_queue_depth{{{key}}} {limiter.waiting}"
+                for key, limiter in self.limiters.items()
+            ),
+            "# TYPE sio_handler_in_progress gauge",
+            *(
+                f"sio_handler_in_progress{{{key}}} {limiter.running}"
+                for key, limiter in self.limiters.items()
+            ),
+            "# TYPE sio_handler_rate_limited_total counter",
+            *(
+                f"sio_handler_rate_limited_total{{{key}}} {rate_limiter.rejected}"
+                for key, rate_limiter in self.rate_limiters.items()
+            ),
+        ]
+
+        lines += [
+            "# TYPE sio_emitter_messages_total counter",
+            *(
+                f"sio_emitter_messages_total{{{key}}} {metrics.messages}"
+                for key, (metrics, _) in self.emitters.items()
+            ),
+            "# TYPE sio_emitter_sent_bytes_total counter",
+            *(
+                f"sio_emitter_sent_bytes_total{{{key}}} {metrics.sent_bytes}"
+                for key, (metrics, _) in self.emitters.items()
+            ),
+            "# TYPE sio_emitter_dropped_total counter",
+            *(
+                f"sio_emitter_dropped_total{{{key}}} {emitter.dropped_messages}"
+                for key, (_, emitter) in self.emitters.items()
+            ),
+            "# TYPE sio_emitter_encode_duration_seconds histogram",
+        ]
+        for key, (metrics, _) in self.emitters.items():
+            lines += metrics.encode_duration.render(
+                "sio_emitter_encode_duration_seconds", key
+            )
+
+        lines.append("# TYPE sio_emitter_payload_bytes histogram")
+        for key, (metrics, _) in self.emitters.items():
+            lines += metrics.payload_size.render("sio_emitter_payload_bytes", key)
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,209 @@
+"""
+Middleware of event handlers. Hooks of all the middleware registered
+on the app are compiled together with the payload validation and
+metrics into a single dispatch function per handler, when the handler
+is registered.
+"""
+
+import inspect
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Type
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from fastapi_sio.handlers import validating_handler, validation_error_ack
+from fastapi_sio.metrics import HandlerMetrics, instrumented_handler
+
+
+class HandlerContext:
+    """
+    Message being handled. Hooks may replace its `data`, which the handler
+    receives, and keep any values of their own in `state`.
+    """
+
+    __slots__ = ("sid", "event", "namespace", "args", "_state")
+
+    def __init__(self, sid: str, event: str, namespace: str, args: Tuple[Any, ...]):
+        self.sid = sid
+        self.event = event
+        self.namespace = namespace
+        self.args = args
+        self._state: dict | None = None
+
+    @property
+    def data(self) -> Any:
+        return self.args[0] if self.args else None
+
+    @data.setter
+    def data(self, value: Any):
+        self.args = (value, *self.args[1:])
+
+    @property
+    def state(self) -> dict:
+        if self._state is None:
+            self._state = {}
+        return self._state
+
+
+class SIOMiddleware:
+    """
+    Base class of handler middleware, added with `FastAPISIO.add_middleware`.
+    Only the overridden hooks are called. Hooks may be plain functions,
+    which are cheaper to call, when they do not need to await anything.
+
+        class AuthMiddleware(SIOMiddleware):
+            async def before(self, context):
+                if not await is_authorized(context.sid):
+                    return {"error": "unauthorized"}
+    """
+
+    async def before(self, context: HandlerContext) -> Any:
+        """
+        Called before the payload is validated and the handler is called.
+        Returning anything but `None` skips the handler and the remaining
+        hooks, the message is acknowledged with the returned value.
+        """
+        return None
+
+    async def after(self, context: HandlerContext, result: Any) -> Any:
+        """
+        Called with the value returned by the handler, returns
+        the acknowledgement of the message.
+        """
+        return result
+
+    async def error(self, context: HandlerContext, error: Exception) -> Any:
+        """
+        Called when the handler or any hook raised. Returns the acknowledgement
+        of the message, or raises to pass the error to the next middleware.
+        """
+        raise error
+
+
+def overrides(middleware: SIOMiddleware, hook: str) -> bool:
+    return getattr(type(middleware), hook) is not getattr(SIOMiddleware, hook)
+
+
+def get_hooks(
+    middleware: Iterable[SIOMiddleware], hook: str
+) -> List[Tuple[Callable, bool]]:
+    """
+    Overridden hooks of the middleware, with whether they have to be awaited.
+    """
+    return [
+        (getattr(m, hook), inspect.iscoroutinefunction(getattr(m, hook)))
+        for m in middleware
+        if overrides(m, hook)
+    ]
+
+
+def compile_dispatch(
+    fn: Callable,
+    middleware: Sequence[SIOMiddleware],
+    event: str,
+    namespace: str = "/",
+    model: Type[BaseModel] | None = None,
+    metrics: HandlerMetrics | None = None,
+) -> Callable:
+    """
+    Builds the function handling messages of the event. `before` hooks are
+    called in the order the middleware was added, `after` and `error` hooks
+    in the reverse one. Payloads are validated into the `model`, if given,
+    after the `before` hooks. Calls are counted and timed into `metrics`.
+    """
+    befores = get_hooks(middleware, "before")
+    afters = get_hooks(reversed(middleware), "after")
+    errors = get_hooks(reversed(middleware), "error")
+
+    if not befores and not afters and not errors:
+        handler = validating_handler(fn, model) if model is not None else fn
+        return (
+            instrumented_handler(handler, metrics) if metrics is not None else handler
+        )
+
+    # Hooks, validation and instrumentation are inlined one after another
+    # in the generated function, instead of wrapping the handler in
+    # a coroutine for each of them
+    namespace_vars: Dict[str, Any] = {
+        "HandlerContext": HandlerContext,
+        "ValidationError": ValidationError,
+        "validation_error_ack": validation_error_ack,
+        "handle_error": partial(handle_error, errors),
+        "perf_counter": perf_counter,
+        "fn": fn,
+        "event": event,
+        "namespace": namespace,
+        "metrics": metrics,
+    }
+    body: List[str] = []
+    for index, (hook, is_async_hook) in enumerate(befores):
+        namespace_vars[f"before_{index}"] = hook
+        body += [
+            f"ack = {'await ' if is_async_hook else ''}before_{index}(context)",
+            "if ack is not None:",
+            "    return ack",
+        ]
+    if model is not None:
+        namespace_vars["validate"] = TypeAdapter(model).validate_python
+        body += [
+            "args = context.args",
+            "try:",
+            "    data = validate(args[0] if args else None)",
+            "except ValidationError as error:",
+            "    return validation_error_ack(error)",
+            "context.args = (data, *args[1:])",
+        ]
+    await_fn = "await " if inspect.iscoroutinefunction(fn) else ""
+    body.append(f"result = {await_fn}fn(sid, *context.args)")
+    for index, (hook, is_async_hook) in enumerate(afters):
+        namespace_vars[f"after_{index}"] = hook
+        body.append(
+            f"result = {'await ' if is_async_hook else ''}"
+            f"after_{index}(context, result)"
+        )
+    body.append("return result")
+
+    # Errors are counted even when an `error` hook turns them into an ack
+    on_error = ["metrics.errors += 1"] if metrics is not None else []
+    if errors:
+        on_error.append("return await handle_error(context, error)")
+    elif on_error:
+        on_error.append("raise")
+
+    lines = ["async def dispatch(sid, *args):"]
+    if metrics is not None:
+        lines += indent(["metrics.messages += 1", "start = perf_counter()"])
+    lines += indent(["context = HandlerContext(sid, event, namespace, args)"])
+    if on_error or metrics is not None:
+        lines += indent(["try:", *indent(body)])
+        if on_error:
+            lines += indent(["except Exception as error:", *indent(on_error)])
+        if metrics is not None:
+            lines += indent(["finally:"])
+            lines += indent(
+                indent(["metrics.duration.observe(perf_counter() - start)"])
+            )
+    else:
+        lines += indent(body)
+
+    exec("\n".join(lines), namespace_vars)
+    return namespace_vars["dispatch"]
+
+
+def indent(lines: List[str]) -> List[str]:
+    return ["    " + line for line in lines]
+
+
+async def handle_error(
+    errors: List[Tuple[Callable, bool]], context: HandlerContext, error: Exception
+) -> Any:
+    """
+    Passes the error to the `error` hooks until one of them returns.
+    """
+    for hook, is_async_hook in errors:
+        try:
+            ack = hook(context, error)
+            return await ack if is_async_hook else ack
+        except Exception as raised:
+            error = raised
+    raise error
@@ -0,0 +1,50 @@
+from typing import TYPE_CHECKING, Any, Callable, Type
+
+from fastapi_sio.actors import SIOJsonEmitter, T
+
+if TYPE_CHECKING:
+    from fastapi_sio.applications import FastAPISIO
+
+
+class SIONamespace:
+    """
+    Registry of handlers and emitters scoped to a single Socket.IO
+    namespace. Emitters broadcast only to clients connected to the
+    namespace, events are documented as separate AsyncAPI channels.
+
+    Created through `FastAPISIO.namespace`.
+    """
+
+    def __init__(self, sio_app: "FastAPISIO", namespace: str):
+        self._sio_app = sio_app
+        self.namespace = namespace
+
+    def on(self, event: str, **kwargs: Any) -> Callable:
+        """
+        Registers an event handler, see `FastAPISIO.on`.
+        """
+        return self._sio_app.on(event, namespace=self.namespace, **kwargs)
+
+    def create_emitter(
+        self, event: str, model: Type[T], **kwargs: Any
+    ) -> SIOJsonEmitter[T]:
+        """
+        Creates an emitter, see `FastAPISIO.create_emitter`.
+        """
+        return self._sio_app.create_emitter(
+            event, model=model, namespace=self.namespace, **kwargs
+        )
+
+    def connect(self, fn: Callable) -> Callable:
+        """
+        Registers the handler of connections to the namespace.
+        """
+        self._sio_app._sio.on("connect", handler=fn, namespace=self.namespace)
+        return fn
+
+    def disconnect(self, fn: Callable) -> Callable:
+        """
+        Registers the handler of disconnections from the namespace.
+        """
+        self._sio_app._sio.on("disconnect", handler=fn, namespace=self.namespace)
+        return fn
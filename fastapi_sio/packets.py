@@ -0,0 +1,128 @@
+import json as _json
+from typing import Any, List, Literal, Type
+from uuid import uuid4
+
+from engineio import packet as eio_packet
+from socketio.packet import EVENT, Packet
+
+Serializer = Literal["json", "msgpack"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+}
+
+
+class RawJSON:
+    """
+    Already serialized JSON document. Spliced verbatim into the
+    outgoing packet instead of being encoded once again.
+    """
+
+    __slots__ = ("json",)
+
+    def __init__(self, json: str):
+        self.json = json
+
+
+class _RawJSONCodec:
+    """
+    Drop-in replacement of the `json` module used by python-socketio
+    which is aware of `RawJSON` values anywhere in the encoded object.
+    """
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs) -> str:
+        if isinstance(obj, RawJSON):
+            return obj.json
+
+        # Fast path for event packets, `[event, payload, ...]`
+        if isinstance(obj, list) and any(isinstance(item, RawJSON) for item in obj):
+            item_separator = kwargs.get("separators", (", ", ": "))[0]
+            return (
+                "["
+                + item_separator.join(
+                    _RawJSONCodec.dumps(item, **kwargs) for item in obj
+                )
+                + "]"
+            )
+
+        # `RawJSON` values are unknown to the encoder, so they get replaced
+        # by random placeholders first, which are substituted afterwards.
+        # Payloads without them never reach `default` and cost nothing extra.
+        token = ""
+        raw: list[str] = []
+
+        def default(value: Any) -> str:
+            nonlocal token
+            if not isinstance(value, RawJSON):
+                raise TypeError(
+                    f"Object of type {type(value).__name__} is not JSON serializable"
+                )
+            token = token or uuid4().hex
+            raw.append(value.json)
+            return f"{token}:{len(raw) - 1}"
+
+        encoded = _json.dumps(obj, default=default, **kwargs)
+        for index, value in enumerate(raw):
+            encoded = encoded.replace(f'"{token}:{index}"', value, 1)
+        return encoded
+
+    @staticmethod
+    def loads(*args, **kwargs) -> Any:
+        return _json.loads(*args, **kwargs)
+
+
+class SIOJsonPacket(Packet):
+    """
+    Socket.IO packet which accepts pre-serialized `RawJSON` payloads.
+
+    Used as the `serializer` of the underlying `socketio.AsyncServer`,
+    so the global `socketio.packet.Packet.json` stays untouched.
+    """
+
+    json = _RawJSONCodec
+
+
+def get_packet_class(serializer: Serializer) -> Type[Packet]:
+    """
+    Resolves the packet class of the `socketio.AsyncServer` for given serializer.
+    MessagePack requires the optional `msgpack` package.
+    """
+    if serializer == "json":
+        return SIOJsonPacket
+    if serializer == "msgpack":
+        from socketio.msgpack_packet import MsgPackPacket
+
+        return MsgPackPacket
+    raise ValueError(f"Unknown serializer {serializer!r}")
+
+
+def msgpack_packet_type(data: bytes) -> int | None:
+    """
+    Reads the type of an encoded MessagePack Socket.IO packet,
+    skipping over its data instead of decoding it.
+    """
+    import msgpack
+
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(data)
+    for _ in range(unpacker.read_map_header()):
+        if unpacker.unpack() == "type":
+            return unpacker.unpack()
+        unpacker.skip()
+    return None
+
+
+def encode_event(
+    packet_class: Type[Packet], namespace: str, event: str, args: List[Any]
+) -> List[eio_packet.Packet]:
+    """
+    Encodes the event with its arguments once into the Engine.IO packets
+    which can be sent to any number of clients.
+    """
+    pkt = packet_class(EVENT, namespace=namespace, data=[event] + args)
+    encoded_packet = pkt.encode()
+    if not isinstance(encoded_packet, list):
+        encoded_packet = [encoded_packet]
+    return [eio_packet.Packet(eio_packet.MESSAGE, p) for p in encoded_packet]
@@ -0,0 +1,135 @@
+"""
+Token bucket rate limiting of incoming events, applied by the server
+before the handler is scheduled and its payload validated.
+"""
+
+import re
+from time import monotonic
+from typing import Dict, List, Tuple
+
+UNIT_SECONDS = {
+    "s": 1,
+    "sec": 1,
+    "second": 1,
+    "seconds": 1,
+    "m": 60,
+    "min": 60,
+    "minute": 60,
+    "minutes": 60,
+    "h": 3600,
+    "hour": 3600,
+    "hours": 3600,
+}
+RATE_LIMIT_PATTERN = re.compile(
+    r"^\s*(?P<count>\d+(\.\d+)?)\s*/\s*(?P<period>\d+(\.\d+)?)?\s*"
+    r"(?P<unit>[a-z]+)(\s+(?P<scope>per\s+sid))?\s*$"
+)
+
+
+def parse_rate_limit(rate_limit: str) -> Tuple[float, float, bool]:
+    """
+    Parses limits such as `100/s per sid`, `1000/min` or `5/10s`.
+    Returns the number of events, the period in seconds and whether
+    the limit applies to every client separately.
+    """
+    match = RATE_LIMIT_PATTERN.match(rate_limit)
+    # Milliseconds (`ms`) are rejected as any other unknown unit
+    if match is None or match["unit"] not in UNIT_SECONDS:
+        raise ValueError(f"Invalid rate limit {rate_limit!r}")
+
+    count = float(match["count"])
+    period = float(match["period"] or 1) * UNIT_SECONDS[match["unit"]]
+    if count <= 0 or period <= 0:
+        raise ValueError(f"Invalid rate limit {rate_limit!r}")
+    return count, period, match["scope"] is not None
+
+
+class TokenBucket:
+    """
+    Allows bursts of up to `capacity` events, refilled at `rate` per second.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """
+    Rate limits of a single event, shared by all clients or applied
+    to every client (by its Engine.IO session) separately.
+    """
+
+    # Buckets of idle clients are pruned once there are this many of them
+    PRUNE_THRESHOLD = 1024
+
+    def __init__(self, rate_limits: List[str]):
+        self.rate_limits = rate_limits
+        self.shared: List[TokenBucket] = []
+        self.per_client: List[Tuple[float, float]] = []
+        self.clients: Dict[str, List[TokenBucket]] = {}
+        self.rejected = 0
+        self._prune_at = self.PRUNE_THRESHOLD
+
+        for rate_limit in rate_limits:
+            count, period, per_sid = parse_rate_limit(rate_limit)
+            # Fractional limits (`0.5/s`) still need room for a whole token
+            capacity = max(1.0, count)
+            if per_sid:
+                self.per_client.append((count / period, capacity))
+            else:
+                self.shared.append(TokenBucket(count / period, capacity))
+
+    def allow(self, eio_sid: str) -> bool:
+        now = monotonic()
+        buckets = self.shared
+
+        if self.per_client:
+            client_buckets = self.clients.get(eio_sid)
+            if client_buckets is None:
+                if len(self.clients) >= self._prune_at:
+                    self._prune(now)
+                client_buckets = self.clients[eio_sid] = [
+                    TokenBucket(rate, capacity) for rate, capacity in self.per_client
+                ]
+            buckets = client_buckets + buckets
+
+        # Token is taken only when all the limits allow the event
+        for bucket in buckets:
+            bucket.refill(now)
+        if any(bucket.tokens < 1 for bucket in buckets):
+            self.rejected += 1
+            return False
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return True
+
+    def _prune(self, now: float):
+        """
+        Drops buckets which have refilled completely, they are no different
+        from new ones. Also covers clients which have disconnected.
+        """
+        self.clients = {
+            eio_sid: buckets
+            for eio_sid, buckets in self.clients.items()
+            if not all(bucket.is_full(now) for bucket in buckets)
+        }
+        self._prune_at = max(self.PRUNE_THRESHOLD, 2 * len(self.clients))
+
+
+def rate_limited_ack() -> dict:
+    """
+    Acknowledgement returned to the client when its event is rejected.
+    """
+    return {"error": "rate_limited"}
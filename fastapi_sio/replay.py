@@ -0,0 +1,99 @@
+"""
+Bounded buffers of recently emitted messages, replayed to clients
+which reconnect and present the sequence number of the last message
+they have received.
+"""
+
+from collections import deque
+from itertools import islice
+from time import monotonic
+from typing import Any, Deque, List, Tuple
+
+from engineio import packet as eio_packet
+
+
+class ReplayedMessage:
+    """
+    Message kept for replay, encoded into Engine.IO packets on its first replay.
+    """
+
+    __slots__ = ("seq", "created", "namespace", "to", "skip_sid", "data", "eio_pkts")
+
+    def __init__(
+        self,
+        seq: int,
+        created: float,
+        namespace: str,
+        to: str | List[str] | None,
+        skip_sid: str | List[str] | None,
+        data: Any,
+    ):
+        self.seq = seq
+        self.created = created
+        self.namespace = namespace
+        self.to = to
+        self.skip_sid = skip_sid
+        self.data = data
+        self.eio_pkts: List[eio_packet.Packet] | None = None
+
+    def is_for(self, sid: str, rooms: List[str]) -> bool:
+        skip_sids = (
+            self.skip_sid if isinstance(self.skip_sid, list) else [self.skip_sid]
+        )
+        if sid in skip_sids:
+            return False
+        if self.to is None:
+            return True
+        targets = self.to if isinstance(self.to, list) else [self.to]
+        return any(target in rooms for target in targets)
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of the last `size` messages, dropping messages
+    older than `ttl` seconds. Messages are numbered from 1 in the order
+    they were emitted.
+    """
+
+    def __init__(self, size: int, ttl: float | None = None):
+        self.ttl = ttl
+        self.seq = 0
+        self.messages: Deque[ReplayedMessage] = deque(maxlen=size)
+
+    def append(
+        self,
+        data: Any,
+        namespace: str,
+        to: str | List[str] | None = None,
+        skip_sid: str | List[str] | None = None,
+    ) -> int:
+        self.seq += 1
+        self.messages.append(
+            ReplayedMessage(self.seq, monotonic(), namespace, to, skip_sid, data)
+        )
+        return self.seq
+
+    def since(self, seq: int) -> Tuple[List[ReplayedMessage], bool]:
+        """
+        Returns messages following the `seq` one and whether none of them
+        are missing, which they are when they were already dropped from
+        the buffer, or when `seq` comes from before a server restart.
+        """
+        self._expire()
+        if seq > self.seq:
+            return [], False
+        if not self.messages:
+            return [], seq == self.seq
+
+        # Sequence numbers of buffered messages are contiguous
+        start = seq + 1 - self.messages[0].seq
+        if start < 0:
+            return list(self.messages), False
+        return list(islice(self.messages, start, None)), True
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        expired = monotonic() - self.ttl
+        while self.messages and self.messages[0].created < expired:
+            self.messages.popleft()
@@ -145,6 +145,7 @@ class AsyncAPIOperation(BaseModel):
     traits: OpenAPIReference | None = None  # TODO
     messages: list[OpenAPIReference] | None = None
     reply: OpenAPIReference | None = None  # TODO
+    rate_limit: Annotated[list[str] | None, Field(alias="x-rate-limit")] = None
 
 
 class AsyncAPIParameter(BaseModel):
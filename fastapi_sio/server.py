@@ -0,0 +1,331 @@
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Set,
+    Tuple,
+    Type,
+)
+from weakref import WeakKeyDictionary
+from pydantic import BaseModel, Field
+import engineio
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+from socketio.exceptions import ConnectionRefusedError
+
+from fastapi_sio.actors import current_emitter
+from fastapi_sio.packets import msgpack_packet_type
+from fastapi_sio.ratelimit import RateLimiter, rate_limited_ack
+from fastapi_sio.utils import CORSConfiguration
+
+if TYPE_CHECKING:
+    from fastapi_sio.actors import SIOJsonEmitter
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "disconnect"]
+
+# Environ entries referring to the handshake request, which are
+# of no use once it is handled, but keep it alive for the connection
+HANDSHAKE_ENVIRON_KEYS = frozenset(("wsgi.input", "asgi.receive", "asgi.send"))
+
+# Called with the sid, namespace and room (`None` for the namespace itself)
+# once a client joins it
+JoinListener = Callable[[str, str, str | None], Awaitable[None]]
+
+# Called with the sid, namespace and auth data once a client connects
+ConnectListener = Callable[[str, str, Any], Awaitable[None]]
+
+# Called with the sid, namespace, environ and auth data before the connect
+# handler, refuses the connection by raising
+ConnectGuard = Callable[[str, str, Dict[str, Any], Any], Awaitable[None]]
+
+# Sid of the client whose connect guards already ran in the current task
+guarded_sid: ContextVar[str | None] = ContextVar("guarded_sid", default=None)
+
+# Called with the sid and namespace once a client disconnects
+DisconnectListener = Callable[[str, str], Awaitable[None]]
+
+
+class OutboundQueuePolicy(BaseModel):
+    """
+    Limits the number of packets waiting to be sent to a single client.
+    Once `max_size` is reached, either the oldest or the newest event
+    is dropped, or the client gets disconnected.
+
+    Only standalone event packets are ever dropped, acknowledgements,
+    binary events and Engine.IO control packets are always delivered.
+    """
+
+    max_size: int = Field(default=1000, gt=0)
+    overflow: OverflowPolicy = "drop_oldest"
+
+
+class SIOEngineIOServer(engineio.AsyncServer):
+    """
+    `engineio.AsyncServer` keeping the allowed CORS origins
+    in sync with the CORS configuration of the parent app.
+    """
+
+    cors_configuration: CORSConfiguration | None = None
+
+    async def handle_request(self, *args, **kwargs):
+        if self.cors_configuration is not None:
+            self.cors_allowed_origins = self.cors_configuration.resolve()
+        return await super().handle_request(*args, **kwargs)
+
+
+class SIOAsyncServer(socketio.AsyncServer):
+    """
+    `socketio.AsyncServer` enforcing the outbound queue policy
+    and rate limits of incoming events, running connect guards before
+    the connect handler and notifying connect, join and disconnect
+    listeners of clients connecting to namespaces, entering rooms
+    and disconnecting.
+    """
+
+    packet_class: Type[packet.Packet]
+
+    def __init__(
+        self,
+        *args,
+        outbound_queue: OutboundQueuePolicy | None,
+        cors_configuration: CORSConfiguration | None = None,
+        **kwargs,
+    ):
+        if cors_configuration is not None:
+            kwargs["cors_allowed_origins"] = cors_configuration.resolve()
+        super().__init__(*args, **kwargs)
+        self.eio.cors_configuration = cors_configuration
+        self.outbound_queue = outbound_queue
+        self.dropped_messages = 0
+        # Clients being disconnected for overflowing their outbound queue
+        self._overflowed: Set[str] = set()
+        # Emitters of queued packets, credited with drops of their packets
+        self._packet_emitters: WeakKeyDictionary[
+            eio_packet.Packet, "SIOJsonEmitter"
+        ] = WeakKeyDictionary()
+        self.rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self.connect_guards: List[ConnectGuard] = []
+        self.connect_listeners: List[ConnectListener] = []
+        self.join_listeners: List[JoinListener] = []
+        self.disconnect_listeners: List[DisconnectListener] = []
+        # Rooms entered by clients being connected, by their eio sid and namespace
+        self._pending_joins: Dict[Tuple[str, str], List[str]] = {}
+
+    def _engineio_server_class(self):
+        return SIOEngineIOServer
+
+    async def _handle_eio_connect(self, eio_sid, environ):
+        # Websocket transport keeps using the original environ
+        environ = {
+            key: value
+            for key, value in environ.items()
+            if key not in HANDSHAKE_ENVIRON_KEYS
+        }
+        return await super()._handle_eio_connect(eio_sid, environ)
+
+    async def enter_room(self, sid, room, namespace=None):
+        namespace = namespace or "/"
+        await super().enter_room(sid, room, namespace=namespace)
+        if not self.join_listeners:
+            return
+
+        eio_sid = self.manager.eio_sid_from_sid(sid, namespace)
+        joins = (
+            self._pending_joins.get((eio_sid, namespace))
+            if eio_sid is not None
+            else None
+        )
+        if joins is not None:
+            joins.append(room)
+        else:
+            await self._notify_join(sid, namespace, room)
+
+    async def _handle_connect(self, eio_sid, namespace, data):
+        if not self.connect_listeners and not self.join_listeners:
+            return await super()._handle_connect(eio_sid, namespace, data)
+
+        # Events sent before the connect packet would be ignored by the client
+        namespace = namespace or "/"
+        joins = self._pending_joins[(eio_sid, namespace)] = []
+        try:
+            await super()._handle_connect(eio_sid, namespace, data)
+        finally:
+            del self._pending_joins[(eio_sid, namespace)]
+
+        sid = self.manager.sid_from_eio_sid(eio_sid, namespace)
+        if sid is None or not self.manager.is_connected(sid, namespace):
+            return
+        for listener in self.connect_listeners:
+            await listener(sid, namespace, data)
+        for room in [None, *joins]:
+            await self._notify_join(sid, namespace, room)
+
+    async def _trigger_event(self, event, namespace, *args):
+        if event != "connect" or not self.connect_guards:
+            return await super()._trigger_event(event, namespace, *args)
+
+        # Connect handlers are retried with another signature on TypeError,
+        # auth is passed as the third argument, if at all
+        sid, environ = args[:2]
+        if guarded_sid.get() != sid:
+            guarded_sid.set(sid)
+            try:
+                await self._run_connect_guards(
+                    sid, namespace, environ, args[2] if len(args) > 2 else None
+                )
+            except ConnectionRefusedError:
+                await self._notify_disconnect(sid, namespace)
+                raise
+
+        try:
+            success = await super()._trigger_event(event, namespace, *args)
+        except ConnectionRefusedError:
+            # Guards may keep state of the client, dropped as on disconnect
+            await self._notify_disconnect(sid, namespace)
+            raise
+        if success is False:
+            await self._notify_disconnect(sid, namespace)
+        return success
+
+    async def _run_connect_guards(
+        self, sid: str, namespace: str, environ: Dict[str, Any], auth: Any
+    ):
+        for guard in self.connect_guards:
+            try:
+                await guard(sid, namespace, environ, auth)
+            except ConnectionRefusedError:
+                raise
+            except Exception:
+                self.logger.exception("Connect guard failed for %s", sid)
+                raise ConnectionRefusedError()
+
+    async def _notify_join(self, sid: str, namespace: str, room: str | None):
+        for listener in self.join_listeners:
+            await listener(sid, namespace, room)
+
+    async def disconnect(self, sid, namespace=None, ignore_queue=False):
+        namespace = namespace or "/"
+        if not self.disconnect_listeners:
+            return await super().disconnect(sid, namespace, ignore_queue=ignore_queue)
+
+        connected = self.manager.is_connected(sid, namespace)
+        await super().disconnect(sid, namespace, ignore_queue=ignore_queue)
+        if connected and not self.manager.is_connected(sid, namespace):
+            await self._notify_disconnect(sid, namespace)
+
+    async def _handle_disconnect(self, eio_sid, namespace, reason=None):
+        namespace = namespace or "/"
+        if not self.disconnect_listeners:
+            return await super()._handle_disconnect(eio_sid, namespace, reason)
+
+        sid = self.manager.sid_from_eio_sid(eio_sid, namespace)
+        connected = sid is not None and self.manager.is_connected(sid, namespace)
+        await super()._handle_disconnect(eio_sid, namespace, reason)
+        if sid is not None and connected:
+            await self._notify_disconnect(sid, namespace)
+
+    async def _notify_disconnect(self, sid: str, namespace: str):
+        for listener in self.disconnect_listeners:
+            await listener(sid, namespace)
+
+    async def _handle_event(self, eio_sid, namespace, id, data):
+        # Rejected before a task is spawned for the handler
+        limiter = self.rate_limiters.get((namespace or "/", data[0]))
+        if limiter is not None and not limiter.allow(eio_sid):
+            if id is not None:
+                await self._send_packet(
+                    eio_sid,
+                    self.packet_class(
+                        packet.ACK,
+                        namespace=namespace or "/",
+                        id=id,
+                        data=[rate_limited_ack()],
+                    ),
+                )
+            return
+
+        await super()._handle_event(eio_sid, namespace, id, data)
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        if self.outbound_queue is None or await self._admit(eio_sid, eio_pkt):
+            emitter = current_emitter.get()
+            if emitter is not None:
+                if emitter.metrics is not None:
+                    emitter.metrics.observe_packet(eio_pkt)
+                if (
+                    self.outbound_queue is not None
+                    and self.outbound_queue.overflow == "drop_oldest"
+                ):
+                    self._packet_emitters[eio_pkt] = emitter
+            await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    async def _send_packet(self, eio_sid, pkt):
+        if (
+            self.outbound_queue is None
+            or pkt.packet_type != packet.EVENT
+            or await self._admit(eio_sid, None)
+        ):
+            await super()._send_packet(eio_sid, pkt)
+
+    def _is_droppable(self, eio_pkt: eio_packet.Packet) -> bool:
+        if eio_pkt.packet_type != eio_packet.MESSAGE:
+            return False
+        # MessagePack packets are self-contained, but have to be decoded
+        # to tell events apart from acknowledgements and connection packets
+        if not self.packet_class.uses_binary_events:
+            return (
+                isinstance(eio_pkt.data, bytes)
+                and msgpack_packet_type(eio_pkt.data) == packet.EVENT
+            )
+        # JSON binary events are split into several Engine.IO packets
+        return isinstance(eio_pkt.data, str) and eio_pkt.data[:1] == "2"
+
+    async def _admit(self, eio_sid: str, eio_pkt: eio_packet.Packet | None) -> bool:
+        """
+        Applies the policy before a packet is queued for the client.
+        Returns whether the packet should be sent.
+        """
+        assert self.outbound_queue is not None
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is None or socket.queue.qsize() < self.outbound_queue.max_size:
+            return True
+        if eio_pkt is not None and not self._is_droppable(eio_pkt):
+            return True
+
+        overflow = self.outbound_queue.overflow
+        if overflow == "drop_oldest":
+            queue = socket.queue._queue
+            oldest = next((p for p in queue if self._is_droppable(p)), None)
+            if oldest is None:
+                return True
+            queue.remove(oldest)
+            socket.queue.task_done()
+            self._count_dropped(self._packet_emitters.get(oldest))
+            return True
+
+        if overflow == "disconnect":
+            # Packets queued until the client is gone are dropped silently
+            if eio_sid in self._overflowed:
+                return False
+            self._overflowed.add(eio_sid)
+            self.logger.info("Disconnecting %s, outbound queue is full", eio_sid)
+            self.start_background_task(self._disconnect_overflowed, eio_sid)
+        self._count_dropped(current_emitter.get())
+        return False
+
+    async def _disconnect_overflowed(self, eio_sid: str):
+        try:
+            await self.eio.disconnect(eio_sid)
+        finally:
+            self._overflowed.discard(eio_sid)
+
+    def _count_dropped(self, emitter: "SIOJsonEmitter | None"):
+        self.dropped_messages += 1
+        if emitter is not None:
+            emitter.dropped_messages += 1
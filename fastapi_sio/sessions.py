@@ -0,0 +1,197 @@
+"""
+Typed sessions of Socket.IO clients, kept in a bounded in-memory cache
+in front of an optional persistent backend shared by the processes.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from time import monotonic, time
+from typing import AsyncIterator, Generic, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+S = TypeVar("S", bound=BaseModel)
+
+
+class SessionBackend(ABC):
+    """
+    Persistent storage of serialized sessions.
+    """
+
+    @abstractmethod
+    async def load(self, key: str) -> Tuple[bytes, float | None] | None:
+        """
+        Returns the session and the seconds left until it expires.
+        """
+
+    @abstractmethod
+    async def save(self, key: str, data: bytes, ttl: float | None): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Stores sessions in a local SQLite database, which can be shared by
+    worker processes on the same host. Queries run in the thread pool.
+
+    :param path: Path to the database file.
+    :param purge_interval: Seconds between deletions of expired sessions.
+    """
+
+    def __init__(self, path: str, purge_interval: float = 60):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._purged_at = monotonic()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL)"
+        )
+
+    async def load(self, key: str) -> Tuple[bytes, float | None] | None:
+        return await run_in_threadpool(self._load, key)
+
+    async def save(self, key: str, data: bytes, ttl: float | None):
+        await run_in_threadpool(self._save, key, data, ttl)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(
+            self._execute, "DELETE FROM sessions WHERE key = ?", key
+        )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _load(self, key: str) -> Tuple[bytes, float | None] | None:
+        now = time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, expires_at FROM sessions WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            return None
+        data, expires_at = row
+        return data, expires_at - now if expires_at is not None else None
+
+    def _save(self, key: str, data: bytes, ttl: float | None):
+        expires_at = time() + ttl if ttl is not None else None
+        self._execute(
+            "INSERT OR REPLACE INTO sessions (key, data, expires_at) VALUES (?, ?, ?)",
+            key,
+            data,
+            expires_at,
+        )
+        if monotonic() - self._purged_at > self.purge_interval:
+            self._purged_at = monotonic()
+            self._execute("DELETE FROM sessions WHERE expires_at <= ?", time())
+
+    def _execute(self, query: str, *params):
+        with self._lock:
+            self._connection.execute(query, params)
+
+
+class SessionStore(Generic[S]):
+    """
+    Sessions validated into `model`, cached in memory for up to `max_size`
+    clients in the least recently used order. Sessions expire `ttl` seconds
+    after they were last saved. Without a `backend`, sessions evicted from
+    the cache are lost. Stores created by `FastAPISIO.create_session_store`
+    are keyed by sid and delete sessions of clients once they disconnect.
+
+        sessions = sio_app.create_session_store(
+            PilotSession, backend=SQLiteSessionBackend("s.db")
+        )
+
+        async with sessions.session(sid) as session:
+            session.drone_id = data.drone_id
+    """
+
+    def __init__(
+        self,
+        model: Type[S],
+        backend: SessionBackend | None = None,
+        max_size: int = 10000,
+        ttl: float | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size has to be at least 1")
+
+        self.model = model
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache: OrderedDict[str, Tuple[S, float | None]] = OrderedDict()
+
+    async def get(self, key: str) -> S:
+        """
+        Returns the session, a new one with model defaults if there is none.
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            session, expires_at = cached
+            if expires_at is None or expires_at > monotonic():
+                self._cache.move_to_end(key)
+                return session
+            del self._cache[key]
+
+        loaded = await self.backend.load(key) if self.backend is not None else None
+        if loaded is None:
+            session, ttl = self.model(), self.ttl
+        else:
+            # Cached only for as long as the backend keeps the session
+            data, ttl = loaded
+            session = self.model.model_validate_json(data)
+        self._remember(key, session, ttl)
+        return session
+
+    async def save(self, key: str, session: S):
+        self._remember(key, session, self.ttl)
+        if self.backend is not None:
+            await self.backend.save(key, session.model_dump_json().encode(), self.ttl)
+
+    async def delete(self, key: str):
+        self._cache.pop(key, None)
+        if self.backend is not None:
+            await self.backend.delete(key)
+
+    @asynccontextmanager
+    async def session(self, key: str) -> AsyncIterator[S]:
+        """
+        Loads the session and saves it once the block exits without error.
+        """
+        session = await self.get(key)
+        yield session
+        await self.save(key, session)
+
+    def evict(self, key: str):
+        """
+        Drops the session from the cache, keeping it in the backend.
+        """
+        self._cache.pop(key, None)
+
+    async def disconnected(self, sid: str, namespace: str):
+        # Sessions keyed by sid cannot be used by any later connection
+        await self.delete(sid)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _remember(self, key: str, session: S, ttl: float | None):
+        expires_at = monotonic() + ttl if ttl is not None else None
+        self._cache[key] = (session, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,104 @@
+"""
+Emitters for producers running outside of the ASGI server
+(background workers, cron jobs, ...), publishing through
+a write-only client manager.
+"""
+
+from typing import Any, Optional, Type, TypeVar
+from pydantic import BaseModel
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from fastapi_sio.actors import BatchPolicy, SIOEmitterMeta, SIOJsonEmitter, make_emitter
+from fastapi_sio.packets import MEDIA_TYPES, Serializer, SIOJsonPacket, get_packet_class
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class WriteOnlyServer:
+    """
+    Minimal stand-in of `socketio.AsyncServer` for emitters,
+    which forwards all emits to the write-only client manager.
+    """
+
+    def __init__(self, client_manager: AsyncPubSubManager, serializer: Serializer):
+        if not client_manager.write_only:
+            raise ValueError("Client manager has to be created with write_only=True")
+
+        self.manager = client_manager
+        self.packet_class = get_packet_class(serializer)
+
+        # The message queue envelope has to understand pre-encoded payloads
+        if issubclass(self.packet_class, SIOJsonPacket):
+            self.manager.json = self.packet_class.json
+
+    async def emit(
+        self,
+        event: str,
+        data: Any = None,
+        to: Any = None,
+        room: Any = None,
+        skip_sid: Any = None,
+        namespace: str | None = None,
+        callback: Any = None,
+        **kwargs,
+    ):
+        if callback is not None:
+            raise ValueError("Callbacks cannot be used by write-only emitters")
+
+        await self.manager.emit(
+            event,
+            data,
+            namespace=namespace or "/",
+            room=to or room,
+            skip_sid=skip_sid,
+            **kwargs,
+        )
+
+    async def call(self, *args, **kwargs):
+        raise ValueError("Write-only emitters cannot wait for acknowledgements")
+
+
+def create_emitter(
+    client_manager: AsyncPubSubManager,
+    event: str,
+    model: Type[T],
+    serializer: Serializer = "json",
+    include: Optional[Any] = None,
+    exclude: Optional[Any] = None,
+    by_alias: bool = True,
+    exclude_unset: bool = False,
+    exclude_defaults: bool = False,
+    exclude_none: bool = False,
+    pre_encode: bool = False,
+    batch: BatchPolicy | None = None,
+    namespace: str = "/",
+) -> SIOJsonEmitter[T]:
+    """
+    Creates an emitter publishing to clients of the servers sharing
+    given write-only client manager. `serializer` and the encoding
+    options have to match the emitter registered in the server.
+
+        manager = socketio.AsyncRedisManager("redis://", write_only=True)
+        purrs = create_emitter(manager, "purrs", model=PurrModel)
+        await purrs.emit(PurrModel(loudness=2, detail="From the worker"))
+    """
+    meta = SIOEmitterMeta(
+        event=event,
+        namespace=namespace,
+        model=model,
+        media_type=MEDIA_TYPES[serializer],
+        include=include,
+        exclude=exclude,
+        by_alias=by_alias,
+        exclude_unset=exclude_unset,
+        exclude_defaults=exclude_defaults,
+        exclude_none=exclude_none,
+        batch=batch,
+    )
+
+    return make_emitter(
+        model=model,
+        meta=meta,
+        sio=WriteOnlyServer(client_manager, serializer),  # type: ignore
+        pre_encode=pre_encode,
+    )
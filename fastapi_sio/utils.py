@@ -1,19 +1,24 @@
-from email.utils import parseaddr
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterable
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from packaging.version import parse
 import re
 
 from pydantic import ValidationError
-from rfc3986.validators import Validator
-from rfc3986.uri import URIReference
-from rfc3986.exceptions import RFC3986Exception
 
-rfc3986_validator = Validator()
+# Validators below are needed only to build the AsyncAPI spec,
+# their dependencies are imported on the first use
 
 
+@lru_cache(maxsize=None)
+def rfc3986_validator():
+    from rfc3986.validators import Validator
+
+    return Validator()
+
+
+@lru_cache(maxsize=None)
 def starlette_version() -> tuple[int, int, int]:
+    from packaging.version import parse
     from starlette import __version__
 
     version = parse(__version__)
@@ -35,40 +40,95 @@ def match_origin(origin: str | None, pattern: str) -> bool:
     return origin is not None and re.match(pattern, origin) is not None
 
 
+class OriginMatcher:
+    """
+    Decides whether an origin is allowed, compiled once from the allowed
+    origins and origin regex. Exact origins are looked up in a set, the
+    regex is precompiled and verdicts are cached per origin. Instances
+    are passed to python-socketio as a `cors_allowed_origins` callable.
+    """
+
+    def __init__(
+        self,
+        origins: Iterable[str] = (),
+        origin_regex: str | None = None,
+        cache_size: int = 1024,
+    ):
+        self.origins = frozenset(origins)
+        self.pattern = re.compile(origin_regex) if origin_regex else None
+        self._is_allowed = lru_cache(maxsize=cache_size)(self._match)
+
+    def __call__(self, origin: str | None, environ: Any = None) -> bool:
+        # Accepting `environ` spares engine.io a failed call with both arguments
+        return origin is not None and self._is_allowed(origin)
+
+    def _match(self, origin: str) -> bool:
+        if origin in self.origins:
+            return True
+        # Whole origin has to match, as in `CORSMiddleware`
+        return self.pattern is not None and self.pattern.fullmatch(origin) is not None
+
+
+class CORSConfiguration:
+    """
+    CORS configuration of the parent app, resolved again whenever
+    middlewares are added to the app, so the Socket.IO server follows
+    `CORSMiddleware` added after `FastAPISIO` was created.
+    """
+
+    def __init__(self, app: FastAPI, default: Any):
+        self.app = app
+        self.default = default
+        self.value = default
+        self._middleware_count: int | None = None
+
+    def resolve(self) -> Any:
+        middleware_count = len(self.app.user_middleware)
+        if middleware_count != self._middleware_count:
+            self._middleware_count = middleware_count
+            self.value = find_cors_configuration(self.app, self.default)
+        return self.value
+
+
 def find_cors_configuration(app: FastAPI, default: Any) -> Any:
     """
     Looks through FastAPI's middlewares to figure
     out any existing CORS configuration of the parent
     app. Returns [default] if middleware is not found.
     """
+    from fastapi.middleware.cors import CORSMiddleware
+
     for middleware in app.user_middleware:
         if middleware.cls is not CORSMiddleware:
             continue
 
         options = get_middleware_options(middleware)
-        origins = options.get("allow_origins")
-        if origins:
-            # Incompatibility fix between CORSMiddleware and python-socketio
-            if origins == ["*"]:
-                origins = "*"
-            return origins
-
+        origins = list(options.get("allow_origins") or [])
         origins_regex = options.get("allow_origin_regex")
-        if origins_regex:
-            return lambda origin: match_origin(origin, origins_regex)
+
+        # Incompatibility fix between CORSMiddleware and python-socketio
+        if "*" in origins:
+            return "*"
+        if origins or origins_regex:
+            return OriginMatcher(origins, origins_regex)
 
     return default
 
 
 def validate_url_rfc3986(value: str) -> None:
+    from rfc3986.uri import URIReference
+    from rfc3986.exceptions import RFC3986Exception
+
     reference = URIReference.from_string(value)
     try:
-        rfc3986_validator.validate(reference)
+        rfc3986_validator().validate(reference)
     except RFC3986Exception:
         raise ValidationError("Values is not a valid RFC3986 URI")
 
 
 def validate_email_address(value: str):
+    from email.utils import parseaddr
+
     parsed_addr = parseaddr(value)
     if parsed_addr == ("", ""):
         raise ValidationError("Wrong e-mail address format")
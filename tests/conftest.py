@@ -0,0 +1,88 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from socketio import packet
+
+from fastapi_sio.server import SIOAsyncServer
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeEngineIO:
+    """
+    Connects clients to the server without any transport. Packets sent
+    to a client are kept in its outbound queue, which nothing drains.
+    """
+
+    def __init__(self, sio: SIOAsyncServer):
+        self.sio = sio
+        # Packets are inspected in place, as the server drops them from there
+        self.queues: Dict[str, Any] = {}
+        self.disconnected: List[str] = []
+        self._count = 0
+        sio.eio.send_packet = self._send_packet
+        sio.eio.disconnect = self._disconnect
+
+    async def connect(self, namespace: str = "/", auth: Any = None) -> Tuple[str, str]:
+        eio_sid = await self.request_connect(namespace, auth)
+        sid = self.sio.manager.sid_from_eio_sid(eio_sid, namespace)
+        assert sid is not None
+        return eio_sid, sid
+
+    async def request_connect(self, namespace: str = "/", auth: Any = None) -> str:
+        """
+        Sends the connect packet, returns the eio sid whether the server
+        accepts the connection or not.
+        """
+        self._count += 1
+        eio_sid = f"eio{self._count}"
+        self.queues[eio_sid] = asyncio.Queue()
+        self.sio.eio.sockets[eio_sid] = SimpleNamespace(
+            queue=self.queues[eio_sid], closed=False
+        )
+        await self.sio._handle_eio_connect(eio_sid, {"REMOTE_ADDR": "127.0.0.1"})
+        connect = self.sio.packet_class(
+            packet.CONNECT, namespace=namespace, data=auth
+        ).encode()
+        await self.receive(eio_sid, connect)
+        return eio_sid
+
+    async def receive(self, eio_sid: str, data: Any):
+        await self.sio._handle_eio_message(eio_sid, data)
+
+    async def close(self, eio_sid: str):
+        del self.sio.eio.sockets[eio_sid]
+        await self.sio._handle_eio_disconnect(eio_sid, "client disconnect")
+
+    def sent(self, eio_sid: str) -> List[Any]:
+        """
+        Data of the Engine.IO packets waiting in the client's queue.
+        """
+        return [eio_pkt.data for eio_pkt in self.queues[eio_sid]._queue]
+
+    def events(self, eio_sid: str) -> List[Any]:
+        """
+        Events waiting in the client's queue, decoded from JSON packets.
+        """
+        return [
+            json.loads(data[data.index("[") :])
+            for data in self.sent(eio_sid)
+            if isinstance(data, str) and data.startswith("2")
+        ]
+
+    async def _send_packet(self, eio_sid: str, eio_pkt):
+        self.queues[eio_sid].put_nowait(eio_pkt)
+
+    async def _disconnect(self, eio_sid: str):
+        self.disconnected.append(eio_sid)
+
+
+@pytest.fixture
+def fake_engineio():
+    return FakeEngineIO
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Any, Dict
+
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO
+
+pytestmark = pytest.mark.anyio
+
+
+class StatusRequest(BaseModel):
+    verbose: bool = False
+
+
+class DeviceStatus(BaseModel):
+    battery: int
+
+
+async def answer_calls(engineio, acks: Dict[str, Any]):
+    """
+    Acknowledges every call sent to the clients, by their eio sid.
+    """
+    answered = set()
+    while True:
+        for eio_sid, ack in acks.items():
+            for data in engineio.sent(eio_sid):
+                # Event packets expecting an acknowledgement carry its id
+                if data.startswith("2") and data[1] != "[":
+                    ack_id = data[1 : data.index("[")]
+                    if (eio_sid, ack_id) not in answered:
+                        answered.add((eio_sid, ack_id))
+                        await engineio.receive(eio_sid, f"3{ack_id}{json.dumps([ack])}")
+        await asyncio.sleep(0.001)
+
+
+async def test_failing_client_does_not_lose_other_acks(fake_engineio, monkeypatch):
+    sio_app = FastAPISIO(app=FastAPI())
+    status = sio_app.create_emitter("status", model=StatusRequest)
+    engineio = fake_engineio(sio_app._sio)
+    eio_ok, ok = await engineio.connect()
+    eio_invalid, invalid = await engineio.connect()
+    _, silent = await engineio.connect()
+    _, failing = await engineio.connect()
+
+    call = sio_app._sio.call
+
+    async def call_failing_for_one(event, data=None, to=None, **kwargs):
+        if to == failing:
+            raise ConnectionError("gone")
+        return await call(event, data=data, to=to, **kwargs)
+
+    monkeypatch.setattr(sio_app._sio, "call", call_failing_for_one)
+    answering = asyncio.create_task(
+        answer_calls(engineio, {eio_ok: {"battery": 80}, eio_invalid: {"battery": "?"}})
+    )
+    try:
+        results = await status.call_many(
+            StatusRequest(),
+            to=[failing, ok, invalid, silent],
+            ack_model=DeviceStatus,
+            timeout=0.2,
+        )
+    finally:
+        answering.cancel()
+
+    assert results.acks == {ok: DeviceStatus(battery=80)}
+    assert list(results.invalid) == [invalid]
+    assert results.timed_out == [silent]
+    assert list(results.failed) == [failing]
+    assert isinstance(results.failed[failing], ConnectionError)
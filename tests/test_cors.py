@@ -0,0 +1,33 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio.utils import OriginMatcher
+
+
+@pytest.mark.parametrize(
+    "origin, allowed",
+    [
+        ("https://app.example.com", True),
+        ("https://drones.good.com", True),
+        ("https://x.good.com.evil.org", False),
+        ("https://good.com", False),
+        ("http://drones.good.com", False),
+        (None, False),
+    ],
+)
+def test_origin_matcher(origin, allowed):
+    matcher = OriginMatcher(["https://app.example.com"], r"https://.*\.good\.com")
+
+    assert matcher(origin) is allowed
+
+
+def test_origins_follow_cors_middleware_added_later():
+    app = FastAPI()
+    sio_app = FastAPISIO(app=app)
+    app.add_middleware(CORSMiddleware, allow_origin_regex=r"https://.*\.good\.com")
+
+    allowed_origins = sio_app._sio.eio.cors_configuration.resolve()
+    assert allowed_origins("https://drones.good.com")
+    assert not allowed_origins("https://drones.good.com.evil.org")
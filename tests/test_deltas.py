@@ -0,0 +1,113 @@
+from typing import Dict
+
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import DeltaPolicy, FastAPISIO
+from fastapi_sio import actors
+from fastapi_sio.server import OutboundQueuePolicy
+
+pytestmark = pytest.mark.anyio
+
+
+class FleetModel(BaseModel):
+    drones: Dict[str, int]
+
+
+def fleet(**drones: int) -> FleetModel:
+    return FleetModel(drones=drones)
+
+
+async def test_patches_carry_their_version_and_base(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    channel = sio_app.create_emitter("fleet", model=FleetModel, delta=DeltaPolicy())
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    await channel.emit(fleet(a=1, b=1))
+    await channel.emit(fleet(a=2, b=1))
+    # Nothing changed, nothing is sent and the version stays
+    await channel.emit(fleet(a=2, b=1))
+    await channel.emit(fleet(a=2))
+
+    assert engineio.events(eio_sid) == [
+        ["fleet", {"drones": {"a": 1, "b": 1}}, 1],
+        ["fleet:patch", {"drones": {"a": 2}}, 2, 1],
+        ["fleet:patch", {"drones": {"b": None}}, 3, 2],
+    ]
+
+
+async def test_resync_request_recovers_dropped_patch(fake_engineio):
+    sio_app = FastAPISIO(
+        app=FastAPI(),
+        outbound_queue=OutboundQueuePolicy(max_size=3, overflow="drop_oldest"),
+    )
+    channel = sio_app.create_emitter(
+        "fleet", model=FleetModel, delta=DeltaPolicy(format="json-patch")
+    )
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    await channel.emit(fleet(a=1))
+    await channel.emit(fleet(a=2))
+    await channel.emit(fleet(a=3))
+
+    # The snapshot was dropped, the last patch does not apply to anything held
+    events = engineio.events(eio_sid)
+    assert [event[0] for event in events] == ["fleet:patch", "fleet:patch"]
+    assert events[0][2:] == [2, 1]
+
+    engineio.queues[eio_sid]._queue.clear()
+    await engineio.receive(eio_sid, '2["fleet:resync"]')
+    await sio_app._sio.sleep(0)
+    assert engineio.events(eio_sid) == [["fleet", {"drones": {"a": 3}}, 3]]
+
+
+async def test_resync_request_sends_followed_targets_only(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    channel = sio_app.create_emitter("fleet", model=FleetModel, delta=DeltaPolicy())
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, sid = await engineio.connect()
+    await sio_app._sio.enter_room(sid, "north")
+
+    await channel.emit(fleet(a=1), room="north")
+    await channel.emit(fleet(b=1), room="south")
+    engineio.queues[eio_sid]._queue.clear()
+
+    await engineio.receive(eio_sid, '2["fleet:resync"]')
+    await sio_app._sio.sleep(0)
+    assert engineio.events(eio_sid) == [["fleet", {"drones": {"a": 1}}, 1]]
+
+
+async def test_joining_client_receives_versioned_snapshot(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    channel = sio_app.create_emitter("fleet", model=FleetModel, delta=DeltaPolicy())
+    engineio = fake_engineio(sio_app._sio)
+
+    await channel.emit(fleet(a=1), room="north")
+    await channel.emit(fleet(a=2), room="north")
+    eio_sid, sid = await engineio.connect()
+    await sio_app._sio.enter_room(sid, "north")
+
+    assert engineio.events(eio_sid) == [["fleet", {"drones": {"a": 2}}, 2]]
+
+
+async def test_snapshot_is_sent_again_after_resync_interval(fake_engineio, monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(actors, "monotonic", lambda: now)
+    sio_app = FastAPISIO(app=FastAPI())
+    channel = sio_app.create_emitter(
+        "fleet", model=FleetModel, delta=DeltaPolicy(resync_interval=10)
+    )
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    await channel.emit(fleet(a=1))
+    now = 111.0
+    await channel.emit(fleet(a=2))
+
+    assert engineio.events(eio_sid) == [
+        ["fleet", {"drones": {"a": 1}}, 1],
+        ["fleet", {"drones": {"a": 2}}, 2],
+    ]
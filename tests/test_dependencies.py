@@ -0,0 +1,97 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from fastapi_sio import Depends, FastAPISIO
+
+pytestmark = pytest.mark.anyio
+
+
+def create_app():
+    sio_app = FastAPISIO(app=FastAPI())
+    calls = []
+
+    async def current_user(auth):
+        calls.append(auth)
+        if not auth or auth.get("token") != "secret":
+            raise HTTPException(401, "invalid token")
+        return "pilot"
+
+    @sio_app.on("whoami")
+    async def handle_whoami(
+        sid, data, user: str = Depends(current_user, scope="connection")
+    ):
+        return user
+
+    return sio_app, calls
+
+
+async def test_connection_dependencies_resolve_on_connect(fake_engineio):
+    sio_app, calls = create_app()
+    engineio = fake_engineio(sio_app._sio)
+
+    eio_sid, _ = await engineio.connect(auth={"token": "secret"})
+    assert calls == [{"token": "secret"}]
+
+    await engineio.receive(eio_sid, '21["whoami",{}]')
+    await engineio.receive(eio_sid, '22["whoami",{}]')
+    await sio_app._sio.sleep(0)
+    assert engineio.sent(eio_sid)[-2:] == ['31["pilot"]', '32["pilot"]']
+    assert len(calls) == 1
+
+    await engineio.close(eio_sid)
+    assert sio_app._connection_dependencies is not None
+    assert sio_app._connection_dependencies.values == {}
+
+
+async def test_failing_connection_dependency_refuses_connection(fake_engineio):
+    sio_app, _ = create_app()
+    engineio = fake_engineio(sio_app._sio)
+
+    eio_sid = await engineio.request_connect(auth={"token": "wrong"})
+
+    assert sio_app._sio.manager.sid_from_eio_sid(eio_sid, "/") is None
+    assert engineio.sent(eio_sid) == ['4{"message":"invalid token"}']
+    assert sio_app._connection_dependencies is not None
+    assert sio_app._connection_dependencies.values == {}
+    assert sio_app._connection_dependencies.auths == {}
+
+
+async def test_unexpected_error_refuses_connection(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+
+    def broken():
+        raise RuntimeError("broken")
+
+    @sio_app.on("ping")
+    async def handle_ping(sid, data, value=Depends(broken, scope="connection")): ...
+
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid = await engineio.request_connect()
+
+    assert sio_app._sio.manager.sid_from_eio_sid(eio_sid, "/") is None
+    assert engineio.sent(eio_sid) == ['4{"message":"Connection rejected by server"}']
+
+
+async def test_guards_run_once_for_legacy_connect_handler(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    calls = []
+    connected = []
+
+    def remote_addr(environ):
+        calls.append(environ["REMOTE_ADDR"])
+        return environ["REMOTE_ADDR"]
+
+    @sio_app.on("ping")
+    async def handle_ping(sid, data, addr=Depends(remote_addr, scope="connection")):
+        return addr
+
+    # Legacy signature, python-socketio retries the call without auth
+    @sio_app.connect
+    async def handle_connect(sid, environ):
+        connected.append(sid)
+
+    engineio = fake_engineio(sio_app._sio)
+    _, sid = await engineio.connect()
+
+    assert connected == [sid]
+    assert calls == ["127.0.0.1"]
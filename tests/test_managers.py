@@ -0,0 +1,212 @@
+"""
+`SIOAsyncManager` overrides internals of python-socketio's `AsyncManager`,
+so every scenario is run with both and has to give the same results.
+"""
+
+from typing import Any, Callable, Dict, List
+
+import pytest
+import socketio
+from fastapi import FastAPI
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio.managers import SIOAsyncManager
+
+pytestmark = pytest.mark.anyio
+
+MANAGERS = [socketio.AsyncManager, SIOAsyncManager]
+
+
+class Clients:
+    """
+    Clients connected through the manager, with their sids replaced
+    by stable names in the observed results.
+    """
+
+    def __init__(self, manager: socketio.AsyncManager):
+        self.manager = manager
+        self.sids: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        socketio.AsyncServer(client_manager=manager)
+
+    async def connect(self, name: str, namespace: str = "/") -> str:
+        sid = await self.manager.connect(f"eio-{name}", namespace)
+        assert sid is not None
+        self.sids[name] = sid
+        self.names[sid] = name
+        return sid
+
+    def rooms(self, name: str, namespace: str = "/") -> List[Any]:
+        rooms = self.manager.get_rooms(self.sids[name], namespace)
+        return sorted(self.names.get(room, room) for room in rooms)
+
+    def participants(self, room: Any, namespace: str = "/") -> List[Any]:
+        return sorted(
+            (self.names[sid], eio_sid)
+            for sid, eio_sid in self.manager.get_participants(namespace, room)
+        )
+
+    def connected(self, namespace: str = "/") -> List[str]:
+        return sorted(
+            name
+            for name, sid in self.sids.items()
+            if self.manager.is_connected(sid, namespace)
+        )
+
+
+async def observe_both(scenario: Callable) -> List[Any]:
+    results = []
+    for manager_class in MANAGERS:
+        clients = Clients(manager_class())
+        results.append(await scenario(clients))
+    assert results[0] == results[1]
+    return results[1]
+
+
+async def test_enter_and_leave_rooms():
+    async def scenario(clients: Clients):
+        a = await clients.connect("a")
+        b = await clients.connect("b")
+        manager = clients.manager
+        await manager.enter_room(a, "/", "drones")
+        await manager.enter_room(a, "/", "drones")
+        await manager.enter_room(b, "/", "drones")
+        await manager.enter_room(b, "/", "alerts")
+        await manager.leave_room(a, "/", "drones")
+        await manager.leave_room(a, "/", "unknown")
+        return [
+            clients.rooms("a"),
+            clients.rooms("b"),
+            clients.participants("drones"),
+            clients.participants("alerts"),
+            clients.participants("unknown"),
+            clients.participants(None),
+            clients.participants(a),
+            clients.participants(["drones", "alerts", a]),
+        ]
+
+    assert await observe_both(scenario) == [
+        ["a"],
+        ["alerts", "b", "drones"],
+        [("b", "eio-b")],
+        [("b", "eio-b")],
+        [],
+        [("a", "eio-a"), ("b", "eio-b")],
+        [("a", "eio-a")],
+        [("a", "eio-a"), ("b", "eio-b")],
+    ]
+
+
+async def test_disconnect_leaves_all_rooms():
+    async def scenario(clients: Clients):
+        a = await clients.connect("a")
+        await clients.connect("b")
+        manager = clients.manager
+        await manager.enter_room(a, "/", "drones")
+        await manager.enter_room(clients.sids["b"], "/", "drones")
+
+        manager.pre_disconnect(a, "/")
+        pending = clients.connected()
+        await manager.disconnect(a, "/")
+        return [
+            pending,
+            clients.connected(),
+            clients.manager.get_rooms(a, "/"),
+            clients.participants("drones"),
+            clients.participants(None),
+            manager.sid_from_eio_sid("eio-a", "/"),
+            manager.pending_disconnect,
+        ]
+
+    assert await observe_both(scenario) == [
+        ["b"],
+        ["b"],
+        [],
+        [("b", "eio-b")],
+        [("b", "eio-b")],
+        None,
+        {},
+    ]
+
+
+async def test_last_client_disconnecting_removes_namespace():
+    async def scenario(clients: Clients):
+        a = await clients.connect("a", "/fleet")
+        await clients.manager.enter_room(a, "/fleet", "drones")
+        await clients.manager.disconnect(a, "/fleet")
+        return [
+            list(clients.manager.get_namespaces()),
+            clients.participants("drones", "/fleet"),
+        ]
+
+    assert await observe_both(scenario) == [[], []]
+
+
+async def test_close_room():
+    async def scenario(clients: Clients):
+        a = await clients.connect("a")
+        b = await clients.connect("b")
+        await clients.manager.enter_room(a, "/", "drones")
+        await clients.manager.enter_room(b, "/", "drones")
+        await clients.manager.close_room("drones", "/")
+        return [clients.rooms("a"), clients.rooms("b"), clients.participants("drones")]
+
+    assert await observe_both(scenario) == [["a"], ["b"], []]
+
+
+async def test_namespaces_are_separate():
+    async def scenario(clients: Clients):
+        a = await clients.connect("a")
+        await clients.connect("a-fleet", "/fleet")
+        await clients.manager.enter_room(a, "/", "drones")
+        return [
+            clients.rooms("a"),
+            clients.rooms("a-fleet", "/fleet"),
+            clients.participants("drones", "/fleet"),
+            sorted(clients.manager.get_namespaces()),
+        ]
+
+    assert await observe_both(scenario) == [
+        ["a", "drones"],
+        ["a-fleet"],
+        [],
+        ["/", "/fleet"],
+    ]
+
+
+async def test_duplicate_connection_is_rejected():
+    async def scenario(clients: Clients):
+        await clients.connect("a")
+        return await clients.manager.connect("eio-a", "/")
+
+    assert await observe_both(scenario) is None
+
+
+async def test_cannot_enter_room_of_another_client():
+    # python-socketio refuses it since 5.17 only
+    for manager_class in [SIOAsyncManager]:
+        clients = Clients(manager_class())
+        a = await clients.connect("a")
+        b = await clients.connect("b")
+        with pytest.raises(ValueError):
+            await clients.manager.enter_room(a, "/", b)
+
+
+@pytest.mark.parametrize("manager_class", MANAGERS)
+async def test_emit_to_overlapping_rooms_delivers_once(fake_engineio, manager_class):
+    sio_app = FastAPISIO(app=FastAPI(), client_manager=manager_class())
+    engineio = fake_engineio(sio_app._sio)
+    clients = [await engineio.connect() for _ in range(3)]
+    (eio_a, a), (eio_b, b), (eio_c, c) = clients
+    for sid in (a, b):
+        await sio_app._sio.enter_room(sid, "drones")
+    for sid in (b, c):
+        await sio_app._sio.enter_room(sid, "alerts")
+
+    await sio_app._sio.emit("ping", 1, to=["drones", "alerts"], skip_sid=c)
+
+    assert [engineio.events(eio_sid) for eio_sid, _ in clients] == [
+        [["ping", 1]],
+        [["ping", 1]],
+        [],
+    ]
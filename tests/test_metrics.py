@@ -0,0 +1,93 @@
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO, SIOMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+class NoteModel(BaseModel):
+    text: str
+
+
+async def test_sent_bytes_count_encoded_bytes(fake_engineio):
+    app = FastAPI()
+    sio_app = FastAPISIO(app=app, metrics_url="/sio/metrics")
+    notes = sio_app.create_emitter("note", model=NoteModel, pre_encode=True)
+    engineio = fake_engineio(sio_app._sio)
+    await engineio.connect()
+    await engineio.connect()
+
+    # Pre-encoded JSON keeps non-ASCII characters unescaped
+    await notes.emit(NoteModel(text="žluťoučký kůň"))
+
+    metrics = TestClient(app).get("/sio/metrics").text
+    size = len('2["note",{"text":"žluťoučký kůň"}]'.encode())
+    labels = 'namespace="/",event="note"'
+    assert f"sio_emitter_sent_bytes_total{{{labels}}} {2 * size}" in metrics
+    assert f"sio_emitter_payload_bytes_sum{{{labels}}} {float(size)}" in metrics
+
+
+def test_label_values_are_escaped():
+    app = FastAPI()
+    sio_app = FastAPISIO(app=app, metrics_url="/sio/metrics")
+
+    @sio_app.on('say "hi"\\\n')
+    async def handle_hi(sid, data): ...
+
+    metrics = TestClient(app).get("/sio/metrics").text
+    assert (
+        'sio_handler_messages_total{namespace="/",event="say \\"hi\\"\\\\\\n"} 0'
+        in metrics.splitlines()
+    )
+
+
+async def test_errors_handled_by_error_hook_are_counted(fake_engineio):
+    class AckErrors(SIOMiddleware):
+        def error(self, context, error):
+            return {"error": str(error)}
+
+    app = FastAPI()
+    sio_app = FastAPISIO(app=app, metrics_url="/sio/metrics")
+    sio_app.add_middleware(AckErrors())
+
+    @sio_app.on("fail")
+    async def handle_fail(sid, data):
+        raise RuntimeError("failed")
+
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+    await engineio.receive(eio_sid, '21["fail",{}]')
+    await sio_app._sio.sleep(0)
+
+    assert engineio.sent(eio_sid)[-1] == '31[{"error":"failed"}]'
+    metrics = TestClient(app).get("/sio/metrics").text
+    labels = 'namespace="/",event="fail"'
+    assert f"sio_handler_errors_total{{{labels}}} 1" in metrics.splitlines()
+
+
+async def test_metrics_are_rendered_on_event_loop(fake_engineio):
+    app = FastAPI()
+    sio_app = FastAPISIO(app=app, metrics_url="/sio/metrics")
+    manager = sio_app._sio.manager
+    threads = []
+    get_namespaces = manager.get_namespaces
+
+    def recording_get_namespaces():
+        threads.append(threading.current_thread())
+        return get_namespaces()
+
+    manager.get_namespaces = recording_get_namespaces
+    await fake_engineio(sio_app._sio).connect()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://sio") as client:
+        response = await client.get("/sio/metrics")
+
+    assert 'sio_connected_clients{namespace="/"} 1' in response.text
+    assert threads == [threading.current_thread()]
@@ -0,0 +1,172 @@
+"""
+`compile_dispatch` generates the dispatch function from source, every
+scenario is run with and without metrics, which change its shape.
+"""
+
+from typing import Any, List
+
+import pytest
+from pydantic import BaseModel
+
+from fastapi_sio import SIOMiddleware
+from fastapi_sio.metrics import HandlerMetrics
+from fastapi_sio.middleware import compile_dispatch
+
+pytestmark = pytest.mark.anyio
+
+
+class RubModel(BaseModel):
+    count: int
+
+
+class Recorder(SIOMiddleware):
+    """
+    Records its hooks into `calls`. `SyncRecorder` has the same hooks
+    as plain functions, to cover both kinds of generated calls.
+    """
+
+    def __init__(self, name: str, calls: List[str], before_ack: Any = None):
+        self.name = name
+        self.calls = calls
+        self.before_ack = before_ack
+
+    async def before(self, context):
+        self.calls.append(f"before {self.name}")
+        return self.before_ack
+
+    async def after(self, context, result):
+        self.calls.append(f"after {self.name}")
+        return [*result, self.name]
+
+    async def error(self, context, error):
+        self.calls.append(f"error {self.name}")
+        raise error
+
+
+class SyncRecorder(Recorder):
+    def before(self, context):
+        self.calls.append(f"before {self.name}")
+        return self.before_ack
+
+    def after(self, context, result):
+        self.calls.append(f"after {self.name}")
+        return [*result, self.name]
+
+
+class AckErrors(SIOMiddleware):
+    def __init__(self, calls: List[str]):
+        self.calls = calls
+
+    def error(self, context, error):
+        self.calls.append("error ack")
+        return {"error": str(error)}
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "metrics"])
+def metrics(request) -> HandlerMetrics | None:
+    return HandlerMetrics() if request.param else None
+
+
+def handler(calls: List[str], fails: bool = False):
+    async def handle(sid, data):
+        calls.append("handler")
+        if fails:
+            raise RuntimeError("failed")
+        return [data]
+
+    return handle
+
+
+async def test_hooks_wrap_handler_in_order(metrics):
+    calls: List[str] = []
+    middleware = [
+        Recorder("a", calls),
+        SyncRecorder("b", calls),
+        Recorder("c", calls),
+    ]
+    dispatch = compile_dispatch(handler(calls), middleware, "rub", metrics=metrics)
+
+    assert await dispatch("sid", 1) == [1, "c", "b", "a"]
+    assert calls == [
+        "before a",
+        "before b",
+        "before c",
+        "handler",
+        "after c",
+        "after b",
+        "after a",
+    ]
+
+
+async def test_before_hook_short_circuits(metrics):
+    calls: List[str] = []
+    middleware = [
+        Recorder("a", calls),
+        SyncRecorder("b", calls, before_ack={"error": "unauthorized"}),
+        Recorder("c", calls),
+    ]
+    dispatch = compile_dispatch(handler(calls), middleware, "rub", metrics=metrics)
+
+    assert await dispatch("sid", 1) == {"error": "unauthorized"}
+    # Neither the handler nor any `after` hook runs
+    assert calls == ["before a", "before b"]
+
+
+async def test_handler_error_skips_after_hooks(metrics):
+    calls: List[str] = []
+    middleware = [AckErrors(calls), Recorder("a", calls), Recorder("b", calls)]
+    dispatch = compile_dispatch(
+        handler(calls, fails=True), middleware, "rub", metrics=metrics
+    )
+
+    assert await dispatch("sid", 1) == {"error": "failed"}
+    assert calls == [
+        "before a",
+        "before b",
+        "handler",
+        "error b",
+        "error a",
+        "error ack",
+    ]
+    if metrics is not None:
+        assert (metrics.messages, metrics.errors) == (1, 1)
+
+
+async def test_error_in_after_hook_reaches_error_hooks(metrics):
+    calls: List[str] = []
+
+    class FailingAfter(SIOMiddleware):
+        def after(self, context, result):
+            raise ValueError("after failed")
+
+    middleware = [AckErrors(calls), Recorder("a", calls), FailingAfter()]
+    dispatch = compile_dispatch(handler(calls), middleware, "rub", metrics=metrics)
+
+    assert await dispatch("sid", 1) == {"error": "after failed"}
+    # Hooks after the failing one are skipped
+    assert calls == ["before a", "handler", "error a", "error ack"]
+
+
+async def test_unhandled_error_is_raised(metrics):
+    calls: List[str] = []
+    dispatch = compile_dispatch(
+        handler(calls, fails=True), [Recorder("a", calls)], "rub", metrics=metrics
+    )
+
+    with pytest.raises(RuntimeError):
+        await dispatch("sid", 1)
+    assert calls == ["before a", "handler", "error a"]
+    if metrics is not None:
+        assert metrics.errors == 1
+
+
+async def test_payload_is_validated_after_before_hooks(metrics):
+    calls: List[str] = []
+    dispatch = compile_dispatch(
+        handler(calls), [Recorder("a", calls)], "rub", model=RubModel, metrics=metrics
+    )
+
+    assert await dispatch("sid", {"count": 2}) == [RubModel(count=2), "a"]
+    ack = await dispatch("sid", {"count": "many"})
+    assert ack["error"] == "validation_error"
+    assert calls == ["before a", "handler", "after a", "before a"]
@@ -0,0 +1,116 @@
+import msgpack
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio.packets import Serializer
+from fastapi_sio.server import OutboundQueuePolicy, OverflowPolicy
+
+pytestmark = pytest.mark.anyio
+
+
+class PositionModel(BaseModel):
+    drone_id: int
+
+
+def create_app(overflow: OverflowPolicy, serializer: Serializer = "json") -> FastAPISIO:
+    return FastAPISIO(
+        app=FastAPI(),
+        serializer=serializer,
+        outbound_queue=OutboundQueuePolicy(max_size=3, overflow=overflow),
+    )
+
+
+async def test_drop_oldest_keeps_newest_events(fake_engineio):
+    sio_app = create_app("drop_oldest")
+    positions = sio_app.create_emitter("position", model=PositionModel)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    for drone_id in range(5):
+        await positions.emit(PositionModel(drone_id=drone_id))
+
+    # Connect packet is never dropped
+    assert engineio.sent(eio_sid)[0].startswith("0")
+    assert engineio.events(eio_sid) == [
+        ["position", {"drone_id": 3}],
+        ["position", {"drone_id": 4}],
+    ]
+    assert sio_app._sio.dropped_messages == 3
+    assert positions.dropped_messages == 3
+
+
+async def test_drop_newest_keeps_queued_events(fake_engineio):
+    sio_app = create_app("drop_newest")
+    positions = sio_app.create_emitter("position", model=PositionModel)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    for drone_id in range(5):
+        await positions.emit(PositionModel(drone_id=drone_id))
+
+    assert engineio.events(eio_sid) == [
+        ["position", {"drone_id": 0}],
+        ["position", {"drone_id": 1}],
+    ]
+    assert sio_app._sio.dropped_messages == 3
+
+
+async def test_drop_oldest_credits_emitter_of_dropped_event(fake_engineio):
+    sio_app = create_app("drop_oldest")
+    positions = sio_app.create_emitter("position", model=PositionModel)
+    alerts = sio_app.create_emitter("alert", model=PositionModel)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    await positions.emit(PositionModel(drone_id=1))
+    await positions.emit(PositionModel(drone_id=2))
+    await alerts.emit(PositionModel(drone_id=3))
+
+    assert engineio.events(eio_sid) == [
+        ["position", {"drone_id": 2}],
+        ["alert", {"drone_id": 3}],
+    ]
+    assert positions.dropped_messages == 1
+    assert alerts.dropped_messages == 0
+
+
+async def test_disconnect_schedules_single_disconnect(fake_engineio):
+    sio_app = create_app("disconnect")
+    positions = sio_app.create_emitter("position", model=PositionModel)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    for drone_id in range(10):
+        await positions.emit(PositionModel(drone_id=drone_id))
+    await sio_app._sio.sleep(0)
+
+    assert engineio.disconnected == [eio_sid]
+    assert sio_app._sio.dropped_messages == 1
+    assert len(engineio.sent(eio_sid)) == 3
+
+
+@pytest.mark.parametrize("serializer", ["json", "msgpack"])
+async def test_acknowledgements_are_never_dropped(fake_engineio, serializer):
+    sio_app = create_app("drop_oldest", serializer=serializer)
+    positions = sio_app.create_emitter("position", model=PositionModel)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+
+    packet_class = sio_app._sio.packet_class
+    for ack_id in range(3):
+        await sio_app._sio._send_packet(
+            eio_sid, packet_class(packet.ACK, namespace="/", id=ack_id, data=["ok"])
+        )
+    await positions.emit(PositionModel(drone_id=1))
+
+    sent = engineio.sent(eio_sid)
+    if serializer == "msgpack":
+        types = [msgpack.unpackb(data)["type"] for data in sent]
+    else:
+        types = [int(data[0]) for data in sent]
+    assert types == [packet.CONNECT, packet.ACK, packet.ACK, packet.ACK, packet.EVENT]
+    assert sio_app._sio.dropped_messages == 0
@@ -0,0 +1,118 @@
+import pytest
+from fastapi import FastAPI
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio import ratelimit
+from fastapi_sio.ratelimit import RateLimiter, parse_rate_limit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize(
+    "unit, seconds",
+    [
+        ("s", 1),
+        ("sec", 1),
+        ("second", 1),
+        ("seconds", 1),
+        ("m", 60),
+        ("min", 60),
+        ("minute", 60),
+        ("minutes", 60),
+        ("h", 3600),
+        ("hour", 3600),
+        ("hours", 3600),
+    ],
+)
+def test_parse_units(unit, seconds):
+    assert parse_rate_limit(f"10/{unit}") == (10, seconds, False)
+    assert parse_rate_limit(f"10 / 5{unit}") == (10, 5 * seconds, False)
+    assert parse_rate_limit(f"2.5/{unit} per sid") == (2.5, seconds, True)
+
+
+@pytest.mark.parametrize(
+    "rate_limit",
+    ["100/ms", "10/hs", "10/ss", "10/mins", "10/secs", "10/day", "10", "0/s", "1/0s"],
+)
+def test_parse_rejects_invalid_limits(rate_limit):
+    with pytest.raises(ValueError):
+        parse_rate_limit(rate_limit)
+
+
+def test_shared_limit_refills(clock):
+    limiter = RateLimiter(["2/s"])
+
+    assert [limiter.allow("a"), limiter.allow("b"), limiter.allow("a")] == [
+        True,
+        True,
+        False,
+    ]
+    clock.now += 0.5
+    assert limiter.allow("b")
+    assert not limiter.allow("b")
+    assert limiter.rejected == 2
+
+
+def test_per_sid_limit_is_separate_for_every_client(clock):
+    limiter = RateLimiter(["1/s per sid", "3/s"])
+
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    assert limiter.allow("b")
+    assert limiter.allow("c")
+    # Shared limit is exhausted, even for a new client
+    assert not limiter.allow("d")
+
+
+def test_fractional_limit_allows_one_event_per_period(clock):
+    limiter = RateLimiter(["0.5/s"])
+
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    clock.now += 1
+    assert not limiter.allow("a")
+    clock.now += 1
+    assert limiter.allow("a")
+
+
+def test_idle_clients_are_pruned(clock):
+    limiter = RateLimiter(["1/s per sid"])
+    for index in range(RateLimiter.PRUNE_THRESHOLD):
+        limiter.allow(str(index))
+
+    clock.now += 1
+    limiter.allow("new")
+    assert list(limiter.clients) == ["new"]
+
+
+@pytest.mark.anyio
+async def test_rejected_events_are_acknowledged(fake_engineio, clock):
+    sio_app = FastAPISIO(app=FastAPI())
+    calls = []
+
+    @sio_app.on("ping", rate_limit="1/min per sid")
+    async def handle_ping(sid, data):
+        calls.append(data)
+        return "pong"
+
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, _ = await engineio.connect()
+    await engineio.receive(eio_sid, '21["ping",1]')
+    await engineio.receive(eio_sid, '22["ping",2]')
+    await sio_app._sio.sleep(0)
+
+    assert calls == [1]
+    assert engineio.sent(eio_sid)[1:] == ['32[{"error":"rate_limited"}]', '31["pong"]']
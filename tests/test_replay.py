@@ -0,0 +1,110 @@
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO, ReplayPolicy
+from fastapi_sio import replay
+from fastapi_sio.replay import ReplayBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+class PositionModel(BaseModel):
+    drone_id: int
+
+
+def seqs(buffer: ReplayBuffer, seq: int):
+    messages, complete = buffer.since(seq)
+    return [message.seq for message in messages], complete
+
+
+def test_buffer_returns_messages_following_seq():
+    buffer = ReplayBuffer(size=10)
+    for drone_id in range(3):
+        buffer.append(drone_id, "/")
+
+    assert seqs(buffer, 0) == ([1, 2, 3], True)
+    assert seqs(buffer, 2) == ([3], True)
+    assert seqs(buffer, 3) == ([], True)
+
+
+def test_buffer_reports_dropped_messages():
+    buffer = ReplayBuffer(size=2)
+    for drone_id in range(4):
+        buffer.append(drone_id, "/")
+
+    assert seqs(buffer, 1) == ([3, 4], False)
+    assert seqs(buffer, 2) == ([3, 4], True)
+    # Sequence number from before a server restart
+    assert seqs(buffer, 7) == ([], False)
+
+
+def test_buffer_expires_old_messages(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(replay, "monotonic", lambda: now)
+    buffer = ReplayBuffer(size=10, ttl=5)
+    buffer.append(1, "/")
+    now = 103.0
+    buffer.append(2, "/")
+
+    now = 106.0
+    assert seqs(buffer, 0) == ([2], False)
+    now = 109.0
+    assert seqs(buffer, 1) == ([], False)
+    assert seqs(buffer, 2) == ([], True)
+
+
+async def test_reconnecting_client_receives_missed_messages(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    positions = sio_app.create_emitter(
+        "position", model=PositionModel, replay=ReplayPolicy(size=10)
+    )
+    engineio = fake_engineio(sio_app._sio)
+
+    eio_sid, sid = await engineio.connect()
+    await sio_app._sio.enter_room(sid, "north")
+    await positions.emit(PositionModel(drone_id=1))
+    assert engineio.events(eio_sid) == [["position", {"drone_id": 1}, 1]]
+    await engineio.close(eio_sid)
+
+    await positions.emit(PositionModel(drone_id=2), room="north")
+    await positions.emit(PositionModel(drone_id=3), room="south")
+    await positions.emit(PositionModel(drone_id=4))
+
+    eio_sid, sid = await engineio.connect(auth={"replay": {"position": 1}})
+    # Not back in the north room yet, only the message to everyone is replayed
+    assert engineio.events(eio_sid) == [["position", {"drone_id": 4}, 4]]
+
+
+async def test_replay_follows_rooms_of_client(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    positions = sio_app.create_emitter(
+        "position", model=PositionModel, replay=ReplayPolicy(size=10)
+    )
+    engineio = fake_engineio(sio_app._sio)
+    await positions.emit(PositionModel(drone_id=1), room="north")
+    await positions.emit(PositionModel(drone_id=2), room="south")
+
+    eio_sid, sid = await engineio.connect()
+    await sio_app._sio.enter_room(sid, "north")
+    engineio.queues[eio_sid]._queue.clear()
+
+    assert await positions.replay(sid, 0)
+    assert engineio.events(eio_sid) == [["position", {"drone_id": 1}, 1]]
+
+
+async def test_resuming_after_dropped_messages_sends_gap(fake_engineio):
+    sio_app = FastAPISIO(app=FastAPI())
+    positions = sio_app.create_emitter(
+        "position", model=PositionModel, replay=ReplayPolicy(size=2)
+    )
+    engineio = fake_engineio(sio_app._sio)
+    for drone_id in range(1, 5):
+        await positions.emit(PositionModel(drone_id=drone_id))
+
+    eio_sid, _ = await engineio.connect(auth={"replay": {"position": 1}})
+    assert engineio.events(eio_sid) == [
+        ["position:gap", 4],
+        ["position", {"drone_id": 3}, 3],
+        ["position", {"drone_id": 4}, 4],
+    ]
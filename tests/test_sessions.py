@@ -0,0 +1,87 @@
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio import sessions
+from fastapi_sio.sessions import SessionStore, SQLiteSessionBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class PilotSession(BaseModel):
+    drone_id: int | None = None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    # Cache and backend expiration follow the same clock
+    clock = Clock()
+    monkeypatch.setattr(sessions, "monotonic", clock)
+    monkeypatch.setattr(sessions, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    yield backend
+    backend.close()
+
+
+async def test_sessions_are_saved_to_the_backend(backend, clock):
+    store = SessionStore(PilotSession, backend=backend, max_size=1)
+
+    async with store.session("a") as session:
+        session.drone_id = 7
+    await store.get("b")
+
+    assert len(store) == 1
+    assert (await store.get("a")).drone_id == 7
+
+
+async def test_least_recently_used_sessions_are_lost_without_backend(clock):
+    store = SessionStore(PilotSession, max_size=2)
+    for key in ("a", "b"):
+        await store.save(key, PilotSession(drone_id=1))
+    await store.get("a")
+    await store.save("c", PilotSession(drone_id=1))
+
+    assert (await store.get("a")).drone_id == 1
+    assert (await store.get("b")).drone_id is None
+
+
+async def test_loaded_session_expires_with_the_backend(backend, clock):
+    writer = SessionStore(PilotSession, backend=backend, ttl=60)
+    reader = SessionStore(PilotSession, backend=backend, ttl=60)
+    await writer.save("a", PilotSession(drone_id=7))
+
+    clock.now += 50
+    assert (await reader.get("a")).drone_id == 7
+    # Loading the session does not extend its lifetime
+    clock.now += 20
+    assert (await reader.get("a")).drone_id is None
+
+
+async def test_sessions_are_deleted_once_the_client_disconnects(
+    fake_engineio, backend, clock
+):
+    sio_app = FastAPISIO(app=FastAPI())
+    store = sio_app.create_session_store(PilotSession, backend=backend)
+    engineio = fake_engineio(sio_app._sio)
+    eio_sid, sid = await engineio.connect()
+    await store.save(sid, PilotSession(drone_id=7))
+
+    await engineio.close(eio_sid)
+
+    # Sids are never reused, the session would stay in the backend forever
+    assert len(store) == 0
+    assert await backend.load(sid) is None
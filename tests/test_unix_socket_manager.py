@@ -0,0 +1,136 @@
+import asyncio
+import os
+import shutil
+import socket
+import tempfile
+from typing import Any, Callable, List
+
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from fastapi_sio import FastAPISIO
+from fastapi_sio.managers import AsyncUnixSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+class NoteModel(BaseModel):
+    text: str
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def sockets_path():
+    # Paths under pytest's `tmp_path` are too long for Unix sockets
+    path = tempfile.mkdtemp(prefix="sio-")
+    yield path
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+async def processes(sockets_path, fake_engineio):
+    """
+    Servers standing for worker processes, sharing clients through
+    their managers' sockets in `sockets_path`.
+    """
+    managers: List[AsyncUnixSocketManager] = []
+
+    async def start() -> Any:
+        manager = AsyncUnixSocketManager(path=sockets_path)
+        sio_app = FastAPISIO(app=FastAPI(), client_manager=manager)
+        notes = sio_app.create_emitter("note", model=NoteModel)
+        engineio = fake_engineio(sio_app._sio)
+        managers.append(manager)
+        return sio_app, notes, engineio
+
+    yield start
+
+    for manager in managers:
+        manager.thread.cancel()
+    await asyncio.sleep(0)
+
+
+async def connect(engineio, manager: AsyncUnixSocketManager):
+    eio_sid, sid = await engineio.connect()
+    # Manager starts listening once the first client connects
+    await wait_for(lambda: os.path.exists(manager.socket_path))
+    return eio_sid, sid
+
+
+async def test_emit_reaches_clients_of_all_processes(processes):
+    sio_a, notes_a, engineio_a = await processes()
+    sio_b, _, engineio_b = await processes()
+    eio_a, _ = await connect(engineio_a, sio_a._sio.manager)
+    eio_b, _ = await connect(engineio_b, sio_b._sio.manager)
+
+    await notes_a.emit(NoteModel(text="hi"))
+
+    await wait_for(lambda: engineio_b.events(eio_b) != [])
+    assert engineio_a.events(eio_a) == [["note", {"text": "hi"}]]
+    assert engineio_b.events(eio_b) == [["note", {"text": "hi"}]]
+
+
+async def test_room_emit_reaches_members_in_other_processes(processes):
+    sio_a, notes_a, engineio_a = await processes()
+    sio_b, _, engineio_b = await processes()
+    await connect(engineio_a, sio_a._sio.manager)
+    eio_member, member = await connect(engineio_b, sio_b._sio.manager)
+    eio_other, _ = await engineio_b.connect()
+    await sio_b._sio.enter_room(member, "north")
+
+    await notes_a.emit(NoteModel(text="north only"), room="north")
+
+    await wait_for(lambda: engineio_b.events(eio_member) != [])
+    assert engineio_b.events(eio_member) == [["note", {"text": "north only"}]]
+    assert engineio_b.events(eio_other) == []
+
+
+async def test_disconnect_reaches_client_in_other_process(processes):
+    sio_a, _, engineio_a = await processes()
+    sio_b, _, engineio_b = await processes()
+    await connect(engineio_a, sio_a._sio.manager)
+    _, sid = await connect(engineio_b, sio_b._sio.manager)
+
+    await sio_a._sio.disconnect(sid)
+
+    await wait_for(lambda: not sio_b._sio.manager.is_connected(sid, "/"))
+
+
+async def test_write_only_manager_publishes_without_listening(processes, sockets_path):
+    sio_app, _, engineio = await processes()
+    eio_sid, _ = await connect(engineio, sio_app._sio.manager)
+    publisher = AsyncUnixSocketManager(path=sockets_path, write_only=True)
+
+    await publisher.emit("note", {"text": "from outside"})
+
+    await wait_for(lambda: engineio.events(eio_sid) != [])
+    assert engineio.events(eio_sid) == [["note", {"text": "from outside"}]]
+    assert not os.path.exists(publisher.socket_path)
+
+
+async def test_stale_socket_of_dead_peer_is_removed(processes):
+    sio_app, notes, engineio = await processes()
+    manager = sio_app._sio.manager
+    await connect(engineio, manager)
+
+    # Bound by a process which died without removing it
+    stale_path = os.path.join(manager.directory, "dead.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stale.bind(stale_path)
+    stale.close()
+
+    await notes.emit(NoteModel(text="hi"))
+
+    assert not os.path.exists(stale_path)
+
+
+def test_too_long_socket_path_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncUnixSocketManager(path=str(tmp_path / ("x" * 100)))